@@ -1,57 +1,136 @@
-import streamlit as st
-from transformers import pipeline
-from utils import load_data, compute_similarity, compute_sentiment
+from utils import compute_similarity
+from model_registry import registry, get_sentiment_model
+from corpus import Corpus
+from sentiment_store import normalize_headline
+from cache import TTLCache
+from scheduler import MicroBatchScheduler
+from metrics import span, register_collector
+from event_study import event_study, summarize
 
 # ============================================
-# CRITICAL FIX: Cache the sentiment model
-# This is what's causing your 57-second delay!
+# The sentiment model lives in model_registry and is shared with
+# utils.compute_sentiment - one copy of the weights per process.
 # ============================================
 
-@st.cache_resource
-def load_sentiment_model():
-    """Load sentiment model ONCE and cache it"""
-    print("🔄 Loading sentiment model (first time only)...")
-    model = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
-    print("✅ Model loaded!")
-    return model
+# Appended rows in news.csv are picked up on the next call without a
+# restart; only the new rows are scored and indexed
+news_corpus = Corpus("news.csv")
 
-@st.cache_data
 def load_news_data():
-    """Load and process news data ONCE"""
-    print("🔄 Loading news data (first time only)...")
-    news_df = load_data("news.csv")
-    news_df = compute_sentiment(news_df)
-    print(f"✅ Loaded {len(news_df)} news articles")
-    return news_df
+    """Load and process news data (incrementally after the first call)"""
+    with span("analysis.corpus"):
+        return news_corpus.refresh()
 
-def analyze_headline(headline):
+# Repeat analyses (same headline, different ticker/period) skip inference
+headline_cache = TTLCache(maxsize=2048, ttl=6 * 3600)
+
+def score_headlines(headlines):
     """
-    Analyze headline - now runs in <2 seconds!
-    Your app.py doesn't need to change at all.
+    Return [(label, score), ...] for several headlines. Cache misses are
+    scored together in batched forward passes (up to the spec's batch_size).
     """
-    # Get cached model and data (fast!)
-    sentiment_model = load_sentiment_model()
-    news_df = load_news_data()
+    spec = registry.spec("sentiment")
+    keys = [(spec.model_name, spec.version, normalize_headline(h)) for h in headlines]
+    results = [headline_cache.get(key) for key in keys]
     
-    # Run sentiment analysis
-    result = sentiment_model(headline, truncation=True, max_length=512)[0]
-    label = result['label']
-    score = result['score']
+    missing = {}
+    for key, headline, result in zip(keys, headlines, results):
+        if result is None and key not in missing:
+            missing[key] = headline
+    
+    if missing:
+        sentiment_model = get_sentiment_model()
+        with span("sentiment.batch_inference"):
+            # Without batch_size the pipeline runs one forward pass per text
+            outputs = sentiment_model(list(missing.values()), truncation=True, max_length=512,
+                                      batch_size=min(len(missing), spec.batch_size))
+        fresh = {key: (output['label'], output['score']) for key, output in zip(missing.keys(), outputs)}
+        for key, result in fresh.items():
+            headline_cache.set(key, result)
+        results = [result if result is not None else fresh[key] for key, result in zip(keys, results)]
+    return results
+
+# Interactive calls from every session share batches (see scheduler.py)
+sentiment_scheduler = MicroBatchScheduler(score_headlines, name="sentiment")
 
-    # Convert to polarity & impact message (same as before)
+register_collector("headline_cache", headline_cache.stats)
+register_collector("sentiment_scheduler", sentiment_scheduler.stats)
+
+def score_headline(headline):
+    """Return (label, score) for a headline, using the result cache when possible"""
+    spec = registry.spec("sentiment")
+    # peek: a miss is counted once, by score_headlines
+    cached = headline_cache.peek((spec.model_name, spec.version, normalize_headline(headline)))
+    if cached is not None:
+        # Cache hits skip the batching window
+        return cached
+    return sentiment_scheduler(headline)
+
+def describe_score(label, score):
+    """Convert a model label/score to polarity & impact message"""
     if label == "POSITIVE":
         impact = f"✓ Positive ({score:.2f} confidence) - Price likely to go up"
         polarity = score
     else:
         impact = f"✗ Negative ({score:.2f} confidence) - Price likely to go down"
         polarity = -score
+    return polarity, impact
+
+def describe_sentiment(headline):
+    """Sentiment stage: polarity and impact message for a headline"""
+    # Run sentiment analysis (cached per normalized headline)
+    with span("analysis.sentiment"):
+        label, score = score_headline(headline)
+    return describe_score(label, score)
+
+def find_matches(news_df, headline, top_n=3, engine=None, window=None, ticker=None):
+    """
+    Similarity stage: best historical matches for a headline, optionally
+    within a time window and only among headlines about `ticker`
+    """
+    with span("analysis.similarity"):
+        matched = compute_similarity(news_df, headline, top_n=top_n, engine=engine,
+                                     window=window, ticker=ticker)
+    return matched[['Date', 'Headline', 'sentiment', 'similarity']].head(top_n)
+
+def add_event_study(matched, ticker):
+    """
+    Attach what `ticker` did after each matched headline (+1/+5/+20 day
+    returns and abnormal returns vs the benchmark). Returns
+    (matched with the extra columns, summary per horizon).
+    """
+    if not ticker or matched is None or matched.empty:
+        return matched, None
+    try:
+        with span("analysis.events"):
+            study = event_study(ticker, matched['Date'])
+    except Exception as e:
+        print(f"❌ Error computing event study for {ticker}: {e}")
+        return matched, None
+    return matched.join(study), summarize(study)
+
+def analyze_headline(headline, window=None, ticker=None):
+    """
+    Analyze headline - now runs in <2 seconds!
+    Your app.py doesn't need to change at all.
+    window limits the historical matches in time (see utils.resolve_window);
+    ticker limits them to headlines about that company, and adds what
+    its price did after each match (see event_study.py).
+    """
+    with span("analysis.total"):
+        # Get cached data (fast!)
+        news_df = load_news_data()
+        
+        polarity, impact = describe_sentiment(headline)
 
-    # Compute similarity with historical headlines
-    matched = compute_similarity(news_df, headline)
+        # Compute similarity with historical headlines
+        matched = find_matches(news_df, headline, window=window, ticker=ticker)
+        matched, events = add_event_study(matched, ticker)
 
-    # Return in same format as before (no changes needed in app.py)
+    # Same format as before, plus the realized moves when a ticker is given
     return {
         'polarity': polarity,
         'impact': impact,
-        'matched': matched[['Date', 'Headline', 'sentiment', 'similarity']].head(3)
-    }
\ No newline at end of file
+        'matched': matched,
+        'event_study': events
+    }
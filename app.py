@@ -1,13 +1,22 @@
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import pandas as pd
+import os
+import time
 from datetime import datetime, timedelta
-from analyzer import analyze_headline
-from utils import get_stock_data
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from pipeline import run_analysis, run_remote_analysis, ticker_news, STAGE_LABELS, ANALYSIS_SERVICE_URL
+from utils import get_stock_data_many
+from indicators import get_indicators
+from charts import (
+    build_price_volume_figure, build_returns_figure, build_rsi_figure,
+    build_cumulative_figure, build_comparison_figure
+)
+from figure_cache import cached_figure
+from data_store import share_prices
+from metrics import span, observe, collect, start_metrics_server
 from login import login_page
-import time
+import threading
 
 
 # --- PAGE CONFIGURATION (Must be first) ---
@@ -17,6 +26,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Prometheus scrape endpoint for this process (MINIPROJ_METRICS_PORT)
+start_metrics_server()
+
 # --- SESSION STATE INITIALIZATION ---
 if "theme" not in st.session_state:
     st.session_state["theme"] = "light"
@@ -29,16 +41,31 @@ if "logged_in" not in st.session_state:
 if "current_analysis" not in st.session_state:
     st.session_state["current_analysis"] = None
 
-def show_analysis_progress():
-    statuses = [
-        "Analyzing headline sentiment and Fetching market data",
-        "Computing AI predictions...",
-        "Calculating impact scores...",
-        "Finalizing results..."
-    ]
-    for status in statuses:
-        with st.spinner(status):
-            time.sleep(1.6)
+def run_analysis_with_progress(headline, ticker, period, comparison_ticker, window=None, match_ticker=False):
+    """Run the concurrent pipeline, advancing the progress bar as stages finish"""
+    if ANALYSIS_SERVICE_URL:
+        with st.spinner("Running analysis on the analysis service..."):
+            return run_remote_analysis(headline, ticker, period, comparison_ticker, window, match_ticker)
+    
+    ctx = get_script_run_ctx()
+
+    def attach_context():
+        # Worker threads need the script context for st.cache_* calls
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+    progress = st.progress(0.0, text="Analyzing headline sentiment and fetching market data...")
+
+    def on_stage(name, done, total, seconds):
+        progress.progress(done / total, text=f"{STAGE_LABELS[name]} ({seconds:.1f}s)")
+
+    try:
+        return run_analysis(
+            headline, ticker, period, comparison_ticker,
+            on_stage=on_stage, initializer=attach_context,
+            window=window, match_ticker=match_ticker
+        )
+    finally:
+        progress.empty()
 
 # --- THEME TOGGLE FUNCTION ---
 def toggle_theme():
@@ -529,6 +556,17 @@ with st.sidebar:
                 if st.button("×", key=f"remove_{fav}"):
                     st.session_state["favorites"].remove(fav)
                     st.rerun()
+        
+        # Quick quotes for every favorite, fetched concurrently
+        if st.button("Load Quotes", use_container_width=True, key="fav_quotes"):
+            quotes = get_stock_data_many(st.session_state["favorites"], "5d")
+            for fav, (fav_df, fav_error) in quotes.items():
+                if fav_df is not None and len(fav_df) > 1:
+                    last_close = fav_df['Close'].iloc[-1]
+                    day_change = (last_close / fav_df['Close'].iloc[-2] - 1) * 100
+                    st.metric(fav, f"${last_close:.2f}", delta=f"{day_change:.2f}%")
+                else:
+                    st.caption(f"{fav}: {fav_error or 'not enough data'}")
     else:
         st.info("No favorites yet. Add tickers from the main form.")
     
@@ -577,6 +615,27 @@ with st.sidebar:
         - Analysis history tracking
         - Multi-metric visualization
         """)
+    
+    # Performance panel for operators (MINIPROJ_ADMIN=1)
+    if os.environ.get("MINIPROJ_ADMIN") == "1":
+        with st.expander("Performance Metrics"):
+            snapshot = collect()
+            stages = snapshot.pop("stages")
+            if stages:
+                st.dataframe(pd.DataFrame([
+                    {
+                        "stage": name,
+                        "calls": stats["count"],
+                        "errors": stats["errors"],
+                        "p50 ms": stats["p50"] * 1000 if stats["p50"] is not None else None,
+                        "p95 ms": stats["p95"] * 1000 if stats["p95"] is not None else None,
+                        "p99 ms": stats["p99"] * 1000 if stats["p99"] is not None else None,
+                    }
+                    for name, stats in stages.items()
+                ]), hide_index=True, use_container_width=True)
+            else:
+                st.caption("No stages timed yet.")
+            st.json(snapshot, expanded=False)
 
 # --- TOP NAVIGATION BAR ---
 col_nav1, col_nav2 = st.columns([8, 1])
@@ -595,9 +654,18 @@ with col_nav2:
 st.divider()
 
 # --- CONFIGURATION SECTION ---
+# Time windows for historical matches (see utils.resolve_window)
+MATCH_WINDOWS = {
+    "All Time": None,
+    "Last 30 Days": "30d",
+    "Last 90 Days": "90d",
+    "Last Year": "1y",
+    "Last 5 Years": "5y",
+}
+
 with st.container():
     st.markdown('<p class="section-header">Simulation Parameters</p>', unsafe_allow_html=True)
-    config_col1, config_col2, config_col3 = st.columns([3, 3, 3])
+    config_col1, config_col2, config_col3, config_col4 = st.columns([3, 3, 3, 3])
     
     with config_col1:
         ticker_default = st.session_state.get("selected_ticker", "TSLA")
@@ -622,6 +690,15 @@ with st.container():
             placeholder="e.g., SPY",
             help="Add a benchmark ticker for comparison"
         ).upper()
+    
+    with config_col4:
+        match_window_label = st.selectbox(
+            "Match Headlines From",
+            options=list(MATCH_WINDOWS),
+            index=0,
+            help="Only compare against historical headlines from this time range."
+        )
+        match_window = MATCH_WINDOWS[match_window_label]
 
 # --- MAIN INPUT SECTION ---
 st.markdown('<p class="section-header">News Analysis</p>', unsafe_allow_html=True)
@@ -633,6 +710,12 @@ headline_input = st.text_area(
     help="Enter any financial news headline to analyze its potential market impact"
 )
 
+match_ticker = st.checkbox(
+    "Only compare with past news about this ticker",
+    value=False,
+    help="Historical matches are limited to headlines that mention the company (when it is in the alias list)."
+)
+
 analyze_button = st.button("Run Analysis", type="primary", use_container_width=False)
 
 # --- GET PLOTLY THEME ---
@@ -657,26 +740,33 @@ def get_plotly_theme():
 
 # --- ANALYSIS & RESULTS ---
 if analyze_button and headline_input.strip():
-    show_analysis_progress()
     try:
-        # 1. Run Analysis
-        result = analyze_headline(headline_input)
-        stock_df = get_stock_data(ticker, period)
+        # 1. Run Analysis (sentiment, similarity and prices in parallel)
+        pipeline_output = run_analysis_with_progress(
+            headline_input, ticker, period, comparison_ticker, match_window, match_ticker
+        )
+        result = pipeline_output["result"]
+        stock_df = pipeline_output["stock_df"]
+        comparison_df = pipeline_output["comparison_df"]
         
-        # Get comparison data if ticker provided
-        comparison_df = None
-        if comparison_ticker:
-            comparison_df = get_stock_data(comparison_ticker, period)
+        # Release the previous analysis' shared frames right away
+        previous = st.session_state["current_analysis"]
+        if previous is not None:
+            for handle in (previous["stock"], previous["comparison"]):
+                if handle is not None:
+                    handle.release()
         
-        # Store analysis in session state
+        # Store analysis in session state; price frames live in the shared
+        # store and the session only keeps handles to them
         st.session_state["current_analysis"] = {
             "result": result,
-            "stock_df": stock_df,
-            "comparison_df": comparison_df,
+            "stock": share_prices(ticker, period, stock_df),
+            "comparison": share_prices(comparison_ticker, period, comparison_df),
             "ticker": ticker,
             "period": period,
             "comparison_ticker": comparison_ticker,
-            "headline": headline_input
+            "headline": headline_input,
+            "window": match_window
         }
         
         # Save to history
@@ -698,10 +788,13 @@ if analyze_button and headline_input.strip():
 
 # Display results if available
 if st.session_state["current_analysis"] is not None:
+    render_start = time.perf_counter()
     analysis = st.session_state["current_analysis"]
     result = analysis["result"]
-    stock_df = analysis["stock_df"]
-    comparison_df = analysis["comparison_df"]
+    stock_handle = analysis["stock"]
+    comparison_handle = analysis["comparison"]
+    stock_df = stock_handle.frame if stock_handle is not None else None
+    comparison_df = comparison_handle.frame if comparison_handle is not None else None
     ticker = analysis["ticker"]
     period = analysis["period"]
     comparison_ticker = analysis["comparison_ticker"]
@@ -709,6 +802,15 @@ if st.session_state["current_analysis"] is not None:
     # Get theme settings
     theme = get_plotly_theme()
     
+    # All indicators in one pass, cached per (ticker, period, last bar)
+    with span("render.indicators"):
+        ind = get_indicators(ticker, period, stock_df)
+    ind_series = ind['series'] if ind is not None else None
+    
+    # Figures are reused across reruns unless the data or theme changes;
+    # the shared-store key already identifies the data
+    stock_fp = str(stock_handle.key) if stock_handle is not None else None
+    
     # --- RESULTS TABS ---
     tab_impact, tab_technical, tab_comparison, tab_raw = st.tabs([
         "Market Impact", 
@@ -752,41 +854,66 @@ if st.session_state["current_analysis"] is not None:
         
         with kpi4:
             if stock_df is not None and len(stock_df) > 1:
-                price_change = ((stock_df['Close'].iloc[-1] - stock_df['Close'].iloc[0]) / stock_df['Close'].iloc[0]) * 100
                 st.metric(
                     f"{period} Change", 
-                    f"${stock_df['Close'].iloc[-1]:.2f}",
-                    delta=f"{price_change:.2f}%"
+                    f"${ind['current_price']:.2f}",
+                    delta=f"{ind['period_change_pct']:.2f}%"
                 )
         
         st.divider()
         
+        # --- REALIZED MOVES AFTER SIMILAR HEADLINES (event_study.py) ---
+        events = result.get('event_study')
+        matched = result.get('matched')
+        if events and matched is not None and 'abn_5d' in matched.columns:
+            st.markdown(f"#### What {ticker} Did After Similar Headlines")
+            event_cols = st.columns(len(events))
+            for col, (horizon, stats) in zip(event_cols, events.items()):
+                with col:
+                    if stats['mean_abnormal'] is not None:
+                        st.metric(
+                            f"+{horizon} Abnormal Return",
+                            f"{stats['mean_abnormal'] * 100:.2f}%",
+                            delta=f"{stats['positive_share'] * 100:.0f}% of {stats['events']} positive",
+                            delta_color="off"
+                        )
+                    else:
+                        st.metric(f"+{horizon} Abnormal Return", "n/a")
+            event_table = matched[['Date', 'Headline', 'similarity', 'ret_1d', 'ret_5d', 'ret_20d', 'abn_5d']].copy()
+            for column in ('ret_1d', 'ret_5d', 'ret_20d', 'abn_5d'):
+                event_table[column] = event_table[column] * 100
+            st.dataframe(
+                event_table.rename(columns={
+                    'ret_1d': '+1d %', 'ret_5d': '+5d %', 'ret_20d': '+20d %', 'abn_5d': '+5d vs benchmark %'
+                }),
+                hide_index=True, use_container_width=True
+            )
+            st.caption("Returns from the close before each headline date; abnormal = ticker minus benchmark.")
+            st.divider()
+        
         # --- TRADING INSIGHTS SECTION ---
         if stock_df is not None and len(stock_df) >= 20:
             st.markdown("#### Trading Insights & Risk Assessment")
             
-            # Calculate additional metrics
-            returns = stock_df['Close'].pct_change().dropna()
-            current_price = stock_df['Close'].iloc[-1]
+            # Precomputed in indicators.py
+            current_price = ind['current_price']
             
-            # Calculate support and resistance levels
-            high_52w = stock_df['High'].tail(252).max() if len(stock_df) >= 252 else stock_df['High'].max()
-            low_52w = stock_df['Low'].tail(252).min() if len(stock_df) >= 252 else stock_df['Low'].min()
+            # Support and resistance levels
+            high_52w = ind['high_52w']
+            low_52w = ind['low_52w']
             
             # Bollinger Bands
-            rolling_mean = stock_df['Close'].rolling(window=20).mean().iloc[-1]
-            rolling_std = stock_df['Close'].rolling(window=20).std().iloc[-1]
-            upper_band = rolling_mean + (2 * rolling_std)
-            lower_band = rolling_mean - (2 * rolling_std)
+            upper_band = ind['upper_band']
+            lower_band = ind['lower_band']
             
             # Risk metrics
-            daily_volatility = returns.std()
-            sharpe_ratio = (returns.mean() / returns.std() * (252 ** 0.5)) if returns.std() != 0 else 0
-            max_drawdown = ((stock_df['Close'] / stock_df['Close'].cummax()) - 1).min() * 100
+            daily_volatility = ind['daily_volatility']
+            sharpe_ratio = ind['sharpe_ratio']
+            max_drawdown = ind['max_drawdown_pct']
             
             # Momentum indicators
-            momentum_5d = ((current_price - stock_df['Close'].iloc[-6]) / stock_df['Close'].iloc[-6] * 100) if len(stock_df) >= 6 else 0
-            momentum_20d = ((current_price - stock_df['Close'].iloc[-21]) / stock_df['Close'].iloc[-21] * 100) if len(stock_df) >= 21 else 0
+            momentum_5d = ind['momentum_5d']
+            momentum_20d = ind['momentum_20d']
             
             insight_col1, insight_col2, insight_col3 = st.columns(3)
             
@@ -825,8 +952,8 @@ if st.session_state["current_analysis"] is not None:
                 st.metric("20-Day Momentum", f"{momentum_20d:.2f}%", delta=f"{momentum_20d:.2f}%")
                 
                 # Trend analysis
-                ma_20 = stock_df['Close'].rolling(window=20).mean().iloc[-1]
-                ma_50 = stock_df['Close'].rolling(window=50).mean().iloc[-1] if len(stock_df) >= 50 else ma_20
+                ma_20 = ind['ma_20']
+                ma_50 = ind['ma_50']
                 
                 if current_price > ma_20 and ma_20 > ma_50:
                     trend = "Strong Uptrend"
@@ -918,106 +1045,10 @@ if st.session_state["current_analysis"] is not None:
         if stock_df is not None:
             st.markdown("#### Price & Volume Trend")
             
-            # Create subplots with secondary y-axis
-            fig = make_subplots(
-                rows=2, cols=1,
-                shared_xaxes=True,
-                vertical_spacing=0.03,
-                row_heights=[0.7, 0.3],
-                subplot_titles=('Price', 'Volume')
-            )
-            
-            # Price chart
-            fig.add_trace(
-                go.Scatter(
-                    x=stock_df['Date'], 
-                    y=stock_df['Close'], 
-                    mode='lines', 
-                    fill='tozeroy', 
-                    name='Close Price',
-                    line=dict(color='#3b82f6', width=2),
-                    fillcolor='rgba(59, 130, 246, 0.2)'
-                ),
-                row=1, col=1
-            )
-            
-            # Add moving averages if enough data
-            if len(stock_df) >= 20:
-                stock_df['MA20'] = stock_df['Close'].rolling(window=20).mean()
-                fig.add_trace(
-                    go.Scatter(
-                        x=stock_df['Date'], 
-                        y=stock_df['MA20'], 
-                        mode='lines', 
-                        name='20-Day MA',
-                        line=dict(color='#f59e0b', width=1.5, dash='dash')
-                    ),
-                    row=1, col=1
-                )
-            
-            if len(stock_df) >= 50:
-                stock_df['MA50'] = stock_df['Close'].rolling(window=50).mean()
-                fig.add_trace(
-                    go.Scatter(
-                        x=stock_df['Date'], 
-                        y=stock_df['MA50'], 
-                        mode='lines', 
-                        name='50-Day MA',
-                        line=dict(color='#8b5cf6', width=1.5, dash='dot')
-                    ),
-                    row=1, col=1
-                )
-            
-            # Volume chart
-            colors = ['#10b981' if stock_df['Close'].iloc[i] >= stock_df['Close'].iloc[i-1] else '#ef4444' 
-                      for i in range(1, len(stock_df))]
-            colors.insert(0, '#6b7280')
-            
-            fig.add_trace(
-                go.Bar(
-                    x=stock_df['Date'], 
-                    y=stock_df['Volume'], 
-                    name='Volume',
-                    marker_color=colors,
-                    showlegend=False
-                ),
-                row=2, col=1
+            fig = cached_figure(
+                ("price_volume", stock_fp, st.session_state["theme"]),
+                lambda: build_price_volume_figure(stock_df, ind_series, theme)
             )
-            
-            fig.update_layout(
-                template=theme['template'],
-                paper_bgcolor=theme['paper_bgcolor'],
-                plot_bgcolor=theme['plot_bgcolor'],
-                font_color=theme['font_color'],
-                height=600,
-                hovermode="x unified",
-                margin=dict(l=0, r=0, t=40, b=0),
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                )
-            )
-            
-            fig.update_xaxes(
-                title_text="Date", 
-                row=2, col=1,
-                gridcolor=theme['grid_color']
-            )
-            fig.update_yaxes(
-                title_text="Price (USD)", 
-                row=1, col=1,
-                gridcolor=theme['grid_color']
-            )
-            fig.update_yaxes(
-                title_text="Volume", 
-                row=2, col=1,
-                gridcolor=theme['grid_color']
-            )
-            
             st.plotly_chart(fig, use_container_width=True)
             
             # Key Statistics
@@ -1025,109 +1056,59 @@ if st.session_state["current_analysis"] is not None:
             stat_col1, stat_col2, stat_col3, stat_col4, stat_col5 = st.columns(5)
             
             with stat_col1:
-                st.metric("Current Price", f"${stock_df['Close'].iloc[-1]:.2f}")
+                st.metric("Current Price", f"${ind['current_price']:.2f}")
             with stat_col2:
-                st.metric("High", f"${stock_df['High'].max():.2f}")
+                st.metric("High", f"${ind['high']:.2f}")
             with stat_col3:
-                st.metric("Low", f"${stock_df['Low'].min():.2f}")
+                st.metric("Low", f"${ind['low']:.2f}")
             with stat_col4:
-                avg_volume = stock_df['Volume'].mean()
-                st.metric("Avg Volume", f"{avg_volume/1e6:.2f}M")
+                st.metric("Avg Volume", f"{ind['avg_volume']/1e6:.2f}M")
             with stat_col5:
-                volatility = stock_df['Close'].pct_change().std() * 100
-                st.metric("Volatility", f"{volatility:.2f}%")
+                st.metric("Volatility", f"{ind['daily_volatility'] * 100:.2f}%")
         else:
             st.error(f"Could not fetch stock data for ticker: {ticker}. Please verify the symbol.")
+        
+        # --- Recent News About This Ticker (from the ticker index) ---
+        with span("render.ticker_news"):
+            try:
+                recent_news = ticker_news(ticker, analysis.get("window"))
+            except Exception as e:
+                recent_news = None
+                print(f"⚠️ Could not load news for {ticker}: {e}")
+        if recent_news is not None and not recent_news.empty:
+            st.markdown(f"#### Recent {ticker} Headlines")
+            st.dataframe(
+                recent_news[['Date', 'Headline', 'sentiment']],
+                hide_index=True, use_container_width=True
+            )
 
     with tab_technical:
         if stock_df is not None:
             st.markdown("#### Technical Indicators")
             
-            # Calculate technical indicators
-            stock_df['Returns'] = stock_df['Close'].pct_change()
-            stock_df['Cumulative_Returns'] = (1 + stock_df['Returns']).cumprod() - 1
-            
-            # RSI Calculation (14-period)
-            delta = stock_df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            stock_df['RSI'] = 100 - (100 / (1 + rs))
-            
+            # Returns, cumulative returns and RSI come from indicators.py
             tech_col1, tech_col2 = st.columns(2)
             
             with tech_col1:
                 # Returns Distribution
-                fig_returns = go.Figure()
-                fig_returns.add_trace(go.Histogram(
-                    x=stock_df['Returns'].dropna() * 100,
-                    nbinsx=50,
-                    name='Daily Returns',
-                    marker_color='#3b82f6'
-                ))
-                fig_returns.update_layout(
-                    title="Daily Returns Distribution (%)",
-                    template=theme['template'],
-                    paper_bgcolor=theme['paper_bgcolor'],
-                    plot_bgcolor=theme['plot_bgcolor'],
-                    font_color=theme['font_color'],
-                    height=400,
-                    showlegend=False,
-                    xaxis_title="Return (%)",
-                    yaxis_title="Frequency",
-                    xaxis=dict(gridcolor=theme['grid_color']),
-                    yaxis=dict(gridcolor=theme['grid_color'])
+                fig_returns = cached_figure(
+                    ("returns", stock_fp, st.session_state["theme"]),
+                    lambda: build_returns_figure(ind_series, theme)
                 )
                 st.plotly_chart(fig_returns, use_container_width=True)
             
             with tech_col2:
                 # RSI Chart
-                fig_rsi = go.Figure()
-                fig_rsi.add_trace(go.Scatter(
-                    x=stock_df['Date'],
-                    y=stock_df['RSI'],
-                    mode='lines',
-                    name='RSI',
-                    line=dict(color='#3b82f6', width=2)
-                ))
-                fig_rsi.add_hline(y=70, line_dash="dash", line_color="#ef4444", annotation_text="Overbought")
-                fig_rsi.add_hline(y=30, line_dash="dash", line_color="#10b981", annotation_text="Oversold")
-                fig_rsi.update_layout(
-                    title="Relative Strength Index (RSI)",
-                    template=theme['template'],
-                    paper_bgcolor=theme['paper_bgcolor'],
-                    plot_bgcolor=theme['plot_bgcolor'],
-                    font_color=theme['font_color'],
-                    height=400,
-                    yaxis_title="RSI",
-                    xaxis_title="Date",
-                    xaxis=dict(gridcolor=theme['grid_color']),
-                    yaxis=dict(gridcolor=theme['grid_color'])
+                fig_rsi = cached_figure(
+                    ("rsi", stock_fp, st.session_state["theme"]),
+                    lambda: build_rsi_figure(ind_series, theme)
                 )
                 st.plotly_chart(fig_rsi, use_container_width=True)
             
             # Cumulative Returns
-            fig_cum = go.Figure()
-            fig_cum.add_trace(go.Scatter(
-                x=stock_df['Date'],
-                y=stock_df['Cumulative_Returns'] * 100,
-                mode='lines',
-                fill='tozeroy',
-                name='Cumulative Returns',
-                line=dict(color='#3b82f6', width=2),
-                fillcolor='rgba(59, 130, 246, 0.2)'
-            ))
-            fig_cum.update_layout(
-                title=f"Cumulative Returns Over {period}",
-                template=theme['template'],
-                paper_bgcolor=theme['paper_bgcolor'],
-                plot_bgcolor=theme['plot_bgcolor'],
-                font_color=theme['font_color'],
-                height=400,
-                yaxis_title="Cumulative Return (%)",
-                xaxis_title="Date",
-                xaxis=dict(gridcolor=theme['grid_color']),
-                yaxis=dict(gridcolor=theme['grid_color'])
+            fig_cum = cached_figure(
+                ("cumulative", stock_fp, period, st.session_state["theme"]),
+                lambda: build_cumulative_figure(ind_series, theme, period)
             )
             st.plotly_chart(fig_cum, use_container_width=True)
 
@@ -1135,44 +1116,17 @@ if st.session_state["current_analysis"] is not None:
         if comparison_ticker and comparison_df is not None:
             st.markdown(f"#### {ticker} vs {comparison_ticker}")
             
-            # Normalize prices for comparison
-            stock_normalized = (stock_df['Close'] / stock_df['Close'].iloc[0]) * 100
-            comparison_normalized = (comparison_df['Close'] / comparison_df['Close'].iloc[0]) * 100
-            
-            fig_comp = go.Figure()
-            fig_comp.add_trace(go.Scatter(
-                x=stock_df['Date'],
-                y=stock_normalized,
-                mode='lines',
-                name=ticker,
-                line=dict(color='#3b82f6', width=2.5)
-            ))
-            fig_comp.add_trace(go.Scatter(
-                x=comparison_df['Date'],
-                y=comparison_normalized,
-                mode='lines',
-                name=comparison_ticker,
-                line=dict(color='#f59e0b', width=2.5)
-            ))
-            fig_comp.update_layout(
-                title="Normalized Price Comparison (Base = 100)",
-                template=theme['template'],
-                paper_bgcolor=theme['paper_bgcolor'],
-                plot_bgcolor=theme['plot_bgcolor'],
-                font_color=theme['font_color'],
-                height=500,
-                hovermode="x unified",
-                yaxis_title="Normalized Price",
-                xaxis_title="Date",
-                xaxis=dict(gridcolor=theme['grid_color']),
-                yaxis=dict(gridcolor=theme['grid_color'])
+            fig_comp = cached_figure(
+                ("comparison", stock_fp, str(comparison_handle.key),
+                 ticker, comparison_ticker, st.session_state["theme"]),
+                lambda: build_comparison_figure(stock_df, comparison_df, ticker, comparison_ticker, theme)
             )
             st.plotly_chart(fig_comp, use_container_width=True)
             
             # Performance Metrics
             perf_col1, perf_col2, perf_col3 = st.columns(3)
             
-            ticker_return = ((stock_df['Close'].iloc[-1] - stock_df['Close'].iloc[0]) / stock_df['Close'].iloc[0]) * 100
+            ticker_return = ind['period_change_pct']
             comp_return = ((comparison_df['Close'].iloc[-1] - comparison_df['Close'].iloc[0]) / comparison_df['Close'].iloc[0]) * 100
             outperformance = ticker_return - comp_return
             
@@ -1219,6 +1173,10 @@ if st.session_state["current_analysis"] is not None:
                 file_name=f"{ticker}_{period}_{datetime.now().strftime('%Y%m%d')}.csv",
                 mime="text/csv",
             )
+    
+    # Figures are only sent to the browser after the script ends, so this
+    # covers the Python side of rendering (indicators, figures, widgets)
+    observe("render.results", time.perf_counter() - render_start)
 
 elif analyze_button and not headline_input.strip():
     st.warning("Please enter a headline to simulate.")
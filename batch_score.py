@@ -0,0 +1,164 @@
+"""
+Headless batch scoring for large headline archives (no Streamlit).
+
+    python batch_score.py archive.csv scored.parquet --workers 8
+
+Reads CSV or JSONL in chunks, scores sentiment and the top-k historical
+matches from the reference corpus on a process pool, and streams results
+to Parquet or CSV so memory stays bounded by the chunk size. Each output
+row carries its input row number in 'row'.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import load_data, iter_data, compute_sentiment
+from similarity_index import get_similarity_index, corpus_version, ENGINES, SIMILARITY_ENGINE
+from model_registry import registry
+
+# Per-worker state, filled in by _init_worker
+_worker = {}
+
+
+# ============================================
+# INPUT
+# ============================================
+
+def read_chunks(path, chunksize):
+    """
+    Yield chunks with 'row' (0-based input row number, to join results
+    back to the input), 'Headline' and 'Date' columns (see utils.iter_data)
+    """
+    for chunk in iter_data(path, chunksize):
+        chunk['Headline'] = chunk['Headline'].fillna("")
+        # The reader numbers rows across chunks
+        yield chunk.rename_axis('row').reset_index()
+
+
+# ============================================
+# WORKERS
+# ============================================
+
+def _init_worker(corpus_path, num_threads, engine=None):
+    """
+    Load the reference corpus, its index and the model once per process.
+    With engine="embedding" every worker maps the same vector file.
+    """
+    if num_threads:
+        registry.spec("sentiment").num_threads = num_threads
+    corpus = compute_sentiment(load_data(corpus_path))
+    corpus_version(corpus)
+    _worker["corpus"] = corpus
+    _worker["index"] = get_similarity_index(corpus, engine)
+
+
+def score_chunk(chunk, top_k):
+    """Sentiment plus top-k matches for one chunk of headlines"""
+    chunk = compute_sentiment(chunk)
+    corpus = _worker["corpus"]
+    positions, scores = _worker["index"].top_k_many(chunk['Headline'].tolist(), top_k)
+
+    out = chunk.copy()
+    for rank in range(positions.shape[1]):
+        matched = corpus.iloc[positions[:, rank]]
+        n = rank + 1
+        out[f'match_{n}_headline'] = matched['Headline'].to_numpy()
+        out[f'match_{n}_date'] = matched['Date'].astype(str).to_numpy()
+        out[f'match_{n}_sentiment'] = matched['sentiment'].to_numpy()
+        out[f'match_{n}_similarity'] = scores[:, rank]
+    return out
+
+
+# ============================================
+# OUTPUT
+# ============================================
+
+class ResultWriter:
+    """Append scored chunks to a Parquet or CSV file as they arrive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if 'Date' in df.columns:
+                df = df.assign(Date=df['Date'].astype(str))
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run(input_path, output_path, corpus_path="news.csv", top_k=3,
+        chunksize=10_000, workers=None, threads_per_worker=None, engine=None):
+    """Score every headline in input_path and stream results to output_path"""
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Warm the on-disk caches (scores, TF-IDF index) once before the
+    # workers start, so each of them only reads them back
+    _init_worker(corpus_path, None, engine)
+
+    writer = ResultWriter(output_path)
+    start = time.perf_counter()
+    # spawn: every worker loads its own model instead of forking a parent
+    # that may already hold torch threads
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(corpus_path, threads_per_worker, engine)) as pool:
+            # Keep a bounded window of chunks in flight; write in input order
+            pending = deque()
+            for chunk in read_chunks(input_path, chunksize):
+                pending.append(pool.submit(score_chunk, chunk, top_k))
+                if len(pending) >= 2 * workers:
+                    writer.write(pending.popleft().result())
+                    _report(writer.rows, start)
+            while pending:
+                writer.write(pending.popleft().result())
+                _report(writer.rows, start)
+    finally:
+        writer.close()
+    print(f"✅ Scored {writer.rows} headlines in {time.perf_counter() - start:.1f}s -> {output_path}")
+    return writer.rows
+
+
+def _report(rows, start):
+    elapsed = time.perf_counter() - start
+    print(f"🔄 {rows} headlines scored ({rows / elapsed:.0f}/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large headline file without the UI")
+    parser.add_argument("input", help="CSV or JSONL file with a headline column")
+    parser.add_argument("output", help="Output .parquet or .csv file")
+    parser.add_argument("--corpus", default="news.csv", help="Reference corpus for historical matches")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--engine", choices=ENGINES, default=SIMILARITY_ENGINE,
+                        help="Similarity engine for historical matches")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.corpus, args.top_k, args.chunksize,
+        args.workers, args.threads_per_worker, args.engine)
+
+
+if __name__ == "__main__":
+    main()
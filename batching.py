@@ -0,0 +1,84 @@
+import numpy as np
+
+# ============================================
+# LENGTH-BUCKETED ADAPTIVE BATCHING
+# Headlines are sorted by token length and packed into batches that fit
+# a padded-token budget, so short headlines are not padded up to the
+# longest one in a random slice. A failing batch is split in half until
+# the bad row is isolated, instead of zeroing the whole batch.
+# ============================================
+
+MAX_LENGTH = 512
+
+
+def to_polarity(result):
+    """Map a pipeline result to a signed score (+ positive, - negative)"""
+    return result['score'] if result['label'] == 'POSITIVE' else -result['score']
+
+
+def token_lengths(sentiment_model, headlines):
+    """Token count per headline (falls back to a word-count estimate)"""
+    tokenizer = getattr(sentiment_model, "tokenizer", None)
+    if tokenizer is not None:
+        try:
+            encoded = tokenizer(list(headlines), truncation=True, max_length=MAX_LENGTH)
+            return np.fromiter((len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(headlines))
+        except Exception as e:
+            print(f"⚠️ Tokenizer failed, estimating lengths: {e}")
+    # Roughly 1.3 word pieces per word plus [CLS]/[SEP]
+    return np.fromiter((int(len(h.split()) * 1.3) + 2 for h in headlines), dtype=np.int64, count=len(headlines))
+
+
+def plan_batches(lengths, token_budget=4096, max_batch_size=128):
+    """
+    Group row positions (shortest first) so that
+    rows_in_batch * longest_row_in_batch <= token_budget.
+    """
+    order = np.argsort(lengths, kind="stable")
+    batches = []
+    current = []
+    longest = 0
+    for pos in order:
+        length = max(int(lengths[pos]), 1)
+        padded = (len(current) + 1) * max(longest, length)
+        if current and (padded > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            longest = 0
+        current.append(int(pos))
+        longest = max(longest, length)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _run_batch(sentiment_model, texts, out, positions):
+    """Score one batch; on failure split it to isolate the bad row(s)"""
+    try:
+        results = sentiment_model(texts, truncation=True, max_length=MAX_LENGTH, batch_size=len(texts))
+        for pos, result in zip(positions, results):
+            out[pos] = to_polarity(result)
+    except Exception as e:
+        if len(texts) == 1:
+            print(f"⚠️ Error scoring headline {texts[0][:60]!r}: {e}")
+            out[positions[0]] = None
+            return
+        mid = len(texts) // 2
+        _run_batch(sentiment_model, texts[:mid], out, positions[:mid])
+        _run_batch(sentiment_model, texts[mid:], out, positions[mid:])
+
+
+def score_batched(sentiment_model, headlines, token_budget=4096, max_batch_size=128):
+    """
+    Score headlines in length-bucketed batches and return polarities in
+    the original order (None where a single row could not be scored).
+    """
+    headlines = list(headlines)
+    if not headlines:
+        return []
+    out = [None] * len(headlines)
+    lengths = token_lengths(sentiment_model, headlines)
+    for positions in plan_batches(lengths, token_budget, max_batch_size):
+        texts = [headlines[pos] for pos in positions]
+        _run_batch(sentiment_model, texts, out, positions)
+    return out
@@ -0,0 +1,310 @@
+"""
+Offline benchmark suite for the hot paths.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --corpus-sizes 1000 10000 --stub-model --out bench.json
+    python benchmark.py --compare baseline.json --out bench.json
+
+Everything runs against synthetic data in a throwaway cache folder:
+headline corpora from 1k to 1M rows and price histories from 1mo to
+"max", served by a local fake provider. Results are written as JSON so
+two commits can be compared (--compare flags slowdowns).
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+# Isolate every cache (scores, TF-IDF, prices) before project imports
+_BENCH_DIR = tempfile.mkdtemp(prefix="miniproj-bench-")
+atexit.register(shutil.rmtree, _BENCH_DIR, ignore_errors=True)
+os.environ["MINIPROJ_CACHE_DIR"] = os.path.join(_BENCH_DIR, "cache")
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CORPUS_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_SENTIMENT_SIZES = [1_000, 10_000]
+DEFAULT_PERIODS = ["1mo", "3mo", "6mo", "1y", "2y", "5y", "max"]
+# Trading days in a synthetic "max" history (~40 years)
+MAX_HISTORY_BARS = 10_000
+
+COMPANIES = ["Apple", "Tesla", "NVIDIA", "Microsoft", "Amazon", "Reliance", "Infosys",
+             "Meta", "Alphabet", "JPMorgan", "Exxon", "Pfizer", "Boeing", "Intel"]
+EVENTS = ["reports record quarterly revenue", "misses earnings estimates", "announces stock buyback",
+          "faces regulatory probe", "unveils new product line", "cuts full-year guidance",
+          "shares surge after upgrade", "stock falls on supply concerns", "signs acquisition deal",
+          "raises dividend", "announces layoffs", "beats analyst expectations"]
+CONTEXT = ["amid cooling inflation", "as rates stay high", "in volatile session", "ahead of Fed meeting",
+           "despite weak demand", "on strong AI demand", "after CEO comments", ""]
+
+
+# ============================================
+# SYNTHETIC DATA
+# ============================================
+
+def synthetic_headlines(n, seed=0):
+    rng = np.random.default_rng(seed)
+    company = np.array(COMPANIES)[rng.integers(len(COMPANIES), size=n)]
+    event = np.array(EVENTS)[rng.integers(len(EVENTS), size=n)]
+    context = np.array(CONTEXT)[rng.integers(len(CONTEXT), size=n)]
+    pct = rng.integers(1, 30, size=n)
+    return [f"{c} {e} {p}% {x}".strip() for c, e, p, x in zip(company, event, pct, context)]
+
+
+def synthetic_corpus_csv(n, seed=0):
+    path = os.path.join(_BENCH_DIR, f"corpus_{n}.csv")
+    if not os.path.exists(path):
+        dates = pd.date_range(end="2025-01-01", periods=n, freq="min").strftime("%Y-%m-%d")
+        pd.DataFrame({"Date": dates, "Headline": synthetic_headlines(n, seed)}).to_csv(path, index=False)
+    return path
+
+
+def fake_provider(bars=MAX_HISTORY_BARS, seed=0):
+    """Local stand-in for yfinance: deterministic random-walk OHLCV ending today"""
+    def fetch(ticker, period=None, start=None, **kwargs):
+        # crc32, not hash(): str hashes are salted per process
+        rng = np.random.default_rng([zlib.crc32(ticker.encode()), seed])
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=bars, tz="America/New_York", name="Date")
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+        df = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.005, bars)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1_000_000, 5_000_000, bars),
+        }, index=dates)
+        if start is not None:
+            return df[df.index >= pd.Timestamp(start, tz="America/New_York")]
+        if period and period != "max":
+            from price_store import period_start
+            return df[df.index >= pd.Timestamp(period_start(period), tz="America/New_York")]
+        return df
+    return fetch
+
+
+class StubModel:
+    """Deterministic stand-in for the sentiment pipeline (harness checks only)"""
+
+    def __call__(self, texts, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        return [{"label": "POSITIVE" if len(t) % 2 else "NEGATIVE", "score": 0.9} for t in texts]
+
+
+# ============================================
+# TIMING HELPERS
+# ============================================
+
+results = []
+
+
+def timeit(fn, repeat=5):
+    """Median and min wall time of fn() over `repeat` runs"""
+    times = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times), value
+
+
+def record(bench, size, metric, value, unit):
+    results.append({"bench": bench, "size": size, "metric": metric, "value": value, "unit": unit})
+    print(f"  {bench:<22} {str(size):>9}  {metric:<18} {value:>12.4f} {unit}")
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def bench_load_data(sizes, repeat):
+    from utils import load_data
+    for n in sizes:
+        path = synthetic_corpus_csv(n)
+        median, _, df = timeit(lambda: load_data(path), repeat)
+        record("load_data", n, "seconds", median, "s")
+        record("load_data", n, "rows_per_second", n / median, "rows/s")
+        record("load_data", n, "memory_mb", df.memory_usage(deep=True).sum() / 1e6, "MB")
+
+
+def bench_sentiment(sizes):
+    import utils
+    from model_registry import registry
+    from sentiment_store import SentimentStore
+    for n in sizes:
+        df = pd.DataFrame({"Headline": synthetic_headlines(n, seed=n)})
+        # Fresh store file per size so the cold run really scores everything
+        spec = registry.spec("sentiment")
+        store = SentimentStore(spec.model_name, spec.version,
+                               path=os.path.join(_BENCH_DIR, f"sentiment_{n}.sqlite3"))
+        utils.get_sentiment_store = lambda: store
+        start = time.perf_counter()
+        utils.compute_sentiment(df.copy())
+        cold = time.perf_counter() - start
+        record("compute_sentiment", n, "cold_rows_per_s", n / cold, "rows/s")
+        start = time.perf_counter()
+        utils.compute_sentiment(df.copy())
+        warm = time.perf_counter() - start
+        record("compute_sentiment", n, "cached_rows_per_s", n / warm, "rows/s")
+
+
+def bench_similarity(sizes, queries=50):
+    from utils import compute_similarity
+    from similarity_index import get_similarity_index
+    query_set = synthetic_headlines(queries, seed=99)
+    for n in sizes:
+        df = pd.DataFrame({"Date": "2025-01-01", "Headline": synthetic_headlines(n), "sentiment": 0.0})
+        start = time.perf_counter()
+        get_similarity_index(df)
+        record("similarity_index", n, "fit_seconds", time.perf_counter() - start, "s")
+        latencies = []
+        for q in query_set:
+            start = time.perf_counter()
+            compute_similarity(df, q)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        record("compute_similarity", n, "p50_ms", latencies[len(latencies) // 2] * 1000, "ms")
+        record("compute_similarity", n, "p95_ms", latencies[int(len(latencies) * 0.95) - 1] * 1000, "ms")
+
+
+def bench_stock_data(periods, repeat):
+    from price_store import PriceStore
+    store = PriceStore(root=os.path.join(_BENCH_DIR, "prices"), fetch=fake_provider())
+    os.makedirs(store.root, exist_ok=True)
+    for i, period in enumerate(periods):
+        ticker = f"T{i}"
+        start = time.perf_counter()
+        df = store.history(ticker, period)
+        record("get_stock_data", period, "cold_ms", (time.perf_counter() - start) * 1000, "ms")
+        median, _, _ = timeit(lambda: store.history(ticker, period), repeat)
+        record("get_stock_data", period, "warm_ms", median * 1000, "ms")
+        record("get_stock_data", period, "bars", len(df), "bars")
+    tickers = [f"M{i}" for i in range(16)]
+    start = time.perf_counter()
+    store.history_many(tickers, "1y")
+    record("history_many", len(tickers), "cold_ms", (time.perf_counter() - start) * 1000, "ms")
+
+
+def bench_indicators_and_charts(periods, repeat):
+    from indicators import compute_indicators
+    from charts import (build_price_volume_figure, build_returns_figure, build_rsi_figure,
+                        build_cumulative_figure, build_comparison_figure)
+    theme = {"template": "plotly_white", "paper_bgcolor": "#ffffff", "plot_bgcolor": "#f9fafb",
+             "font_color": "#111827", "grid_color": "#e5e7eb"}
+    fetch = fake_provider()
+    for period in periods:
+        df = fetch("BENCH", period=period).reset_index()
+        median, _, ind = timeit(lambda: compute_indicators(df), repeat)
+        record("indicators", period, "ms", median * 1000, "ms")
+        series = ind["series"]
+        builders = {
+            "price_volume": lambda: build_price_volume_figure(df, series, theme),
+            "returns": lambda: build_returns_figure(series, theme),
+            "rsi": lambda: build_rsi_figure(series, theme),
+            "cumulative": lambda: build_cumulative_figure(series, theme, period),
+            "comparison": lambda: build_comparison_figure(df, df, "A", "B", theme),
+        }
+        total_bytes = 0
+        for name, build in builders.items():
+            median, _, fig = timeit(build, max(1, repeat // 2))
+            record(f"chart_{name}", period, "ms", median * 1000, "ms")
+            total_bytes += len(fig.to_json())
+        record("charts_payload", period, "kb", total_bytes / 1024, "KB")
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+# Metrics where a larger value is better
+HIGHER_IS_BETTER = ("rows_per_second", "cold_rows_per_s", "cached_rows_per_s")
+
+
+def compare(baseline_path, threshold):
+    """Print results that got worse than the baseline by more than threshold"""
+    with open(baseline_path) as f:
+        baseline = {(r["bench"], str(r["size"]), r["metric"]): r["value"] for r in json.load(f)["results"]}
+    regressions = 0
+    for r in results:
+        old = baseline.get((r["bench"], str(r["size"]), r["metric"]))
+        if not old or r["unit"] in ("bars", "MB"):
+            continue
+        change = (r["value"] - old) / old
+        if r["metric"] in HIGHER_IS_BETTER:
+            change = -change
+        if change > threshold:
+            regressions += 1
+            print(f"⚠️ {r['bench']} [{r['size']}] {r['metric']}: {old:.4f} -> {r['value']:.4f} ({change:+.0%})")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic data")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=DEFAULT_CORPUS_SIZES)
+    parser.add_argument("--sentiment-sizes", type=int, nargs="+", default=DEFAULT_SENTIMENT_SIZES)
+    parser.add_argument("--periods", nargs="+", default=DEFAULT_PERIODS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+",
+                        choices=["load", "sentiment", "similarity", "stock", "charts"],
+                        help="Run only these benchmarks")
+    parser.add_argument("--stub-model", action="store_true",
+                        help="Replace the transformer with a stub (checks the harness, not the model)")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Regression threshold (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.stub_model:
+        from model_registry import registry
+        registry._models["sentiment"] = StubModel()
+
+    selected = set(args.only or ["load", "sentiment", "similarity", "stock", "charts"])
+    if "load" in selected:
+        bench_load_data(args.corpus_sizes, args.repeat)
+    if "sentiment" in selected:
+        bench_sentiment(args.sentiment_sizes)
+    if "similarity" in selected:
+        bench_similarity(args.corpus_sizes)
+    if "stock" in selected:
+        bench_stock_data(args.periods, args.repeat)
+    if "charts" in selected:
+        bench_indicators_and_charts(args.periods, args.repeat)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stub_model": args.stub_model,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Wrote {len(results)} results to {args.out}")
+
+    if args.compare:
+        sys.exit(1 if compare(args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
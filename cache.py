@@ -0,0 +1,118 @@
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================
+# ON-DISK CACHE LOCATION
+# Everything we persist between restarts (scores, indexes, prices)
+# lives under one folder so a replica can share or wipe it easily.
+# ============================================
+
+CACHE_DIR = os.environ.get(
+    "MINIPROJ_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_path(*parts):
+    """Return a path inside the cache folder, creating parent folders as needed"""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def prune_versions(pattern, keep=2):
+    """
+    Delete all but the `keep` most recently written files matching the
+    glob `pattern` (one file per corpus version). Processes that still
+    map a deleted file keep their mapping.
+    """
+    written = []
+    for path in glob.glob(pattern):
+        if ".tmp" in os.path.basename(path):
+            continue
+        try:
+            written.append((os.path.getmtime(path), path))
+        except OSError:
+            # Pruned meanwhile by another replica
+            pass
+    written.sort(reverse=True)
+    for _, path in written[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            # Already gone, or still open on a platform that forbids it
+            pass
+
+
+# ============================================
+# IN-MEMORY LRU + TTL CACHE
+# ============================================
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries also expire after `ttl` seconds.
+    Thread-safe; keeps hit/miss/eviction counters for monitoring.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        return self._lookup(key, default, count_miss=True)
+
+    def peek(self, key, default=None):
+        """
+        Like get(), but a miss is not counted. For fast paths whose miss
+        falls through to code that calls get() for the same key.
+        """
+        return self._lookup(key, default, count_miss=False)
+
+    def _lookup(self, key, default, count_miss):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if self.ttl is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+            if count_miss:
+                self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Counters as a plain dict (handy for st.json or a metrics page)"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
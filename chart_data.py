@@ -0,0 +1,103 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# ============================================
+# CHART DATA LAYER
+# Long histories ("max" can be decades of daily bars) are reduced on the
+# server before they reach the browser:
+# - line traces are downsampled with LTTB, which keeps the visual shape
+# - volume bars are aggregated into buckets
+# - the returns histogram is binned here, so only bin counts are sent
+# - large traces switch to WebGL (Scattergl) rendering
+# ============================================
+
+MAX_CHART_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+
+UP_COLOR = '#10b981'
+DOWN_COLOR = '#ef4444'
+FIRST_BAR_COLOR = '#6b7280'
+
+
+def lttb_indices(y, max_points=MAX_CHART_POINTS):
+    """
+    Largest-Triangle-Three-Buckets: pick max_points positions of y that
+    preserve its shape. Bars are treated as evenly spaced on x.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # max_points - 2 buckets between the (always kept) first and last points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        start = edges[i]
+        end = max(edges[i + 1], start + 1)
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_end = max(next_end, next_start + 1)
+        avg_x = (next_start + next_end - 1) / 2.0
+        avg_y = y[next_start:next_end].mean()
+
+        xs = np.arange(start, end, dtype=np.float64)
+        area = np.abs((a - avg_x) * (y[start:end] - y[a]) - (a - xs) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return np.unique(selected)
+
+
+def downsample_indices(y, max_points=MAX_CHART_POINTS):
+    """LTTB over the finite values only (rolling windows start with NaN)"""
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= max_points:
+        return finite
+    return finite[lttb_indices(y[finite], max_points)]
+
+
+def scatter_trace(**kwargs):
+    """go.Scatter, or go.Scattergl when the trace is large"""
+    n = len(kwargs.get('x', ()))
+    return go.Scattergl(**kwargs) if n > WEBGL_THRESHOLD else go.Scatter(**kwargs)
+
+
+def volume_colors(close):
+    """Green when the close is up vs the previous bar, red otherwise"""
+    close = np.asarray(close, dtype=np.float64)
+    colors = np.where(close[1:] >= close[:-1], UP_COLOR, DOWN_COLOR)
+    return np.concatenate(([FIRST_BAR_COLOR], colors)) if len(close) else colors
+
+
+def volume_bars(dates, close, volume, max_points=MAX_CHART_POINTS):
+    """
+    Volume bars and their colors, summed into at most max_points buckets.
+    A bucket is green when its last close is >= the previous bucket's.
+    """
+    dates = np.asarray(dates)
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    n = len(close)
+    if n <= max_points:
+        return dates, volume, volume_colors(close)
+
+    starts = np.linspace(0, n, max_points, endpoint=False).astype(np.int64)
+    ends = np.append(starts[1:], n) - 1
+    return dates[starts], np.add.reduceat(volume, starts), volume_colors(close[ends])
+
+
+def histogram_bars(values, nbins=50, **kwargs):
+    """Bin values server-side and return a go.Bar instead of raw samples"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return go.Bar(x=[], y=[], **kwargs)
+    counts, edges = np.histogram(values, bins=nbins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return go.Bar(x=centers, y=counts, width=np.diff(edges), **kwargs)
@@ -0,0 +1,238 @@
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from chart_data import downsample_indices, scatter_trace, volume_bars, histogram_bars
+
+# ============================================
+# FIGURE BUILDERS
+# Plain functions of (data, theme) so they can be cached (figure_cache)
+# and benchmarked without starting the Streamlit app. `theme` is the dict
+# returned by app.get_plotly_theme().
+# ============================================
+
+def build_price_volume_figure(stock_df, ind_series, theme):
+    """Price line with moving averages over a volume subplot"""
+    # Create subplots with secondary y-axis
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        row_heights=[0.7, 0.3],
+        subplot_titles=('Price', 'Volume')
+    )
+
+    # Downsample long histories (LTTB on the close keeps the shape);
+    # the moving averages reuse the same bars so the lines line up
+    price_idx = downsample_indices(stock_df['Close'].to_numpy())
+    chart_df = stock_df.iloc[price_idx]
+    chart_ind = ind_series.iloc[price_idx]
+
+    # Price chart
+    fig.add_trace(
+        scatter_trace(
+            x=chart_df['Date'], 
+            y=chart_df['Close'], 
+            mode='lines', 
+            fill='tozeroy', 
+            name='Close Price',
+            line=dict(color='#3b82f6', width=2),
+            fillcolor='rgba(59, 130, 246, 0.2)'
+        ),
+        row=1, col=1
+    )
+
+    # Add moving averages if enough data
+    if len(stock_df) >= 20:
+        fig.add_trace(
+            scatter_trace(
+                x=chart_ind['Date'], 
+                y=chart_ind['MA20'], 
+                mode='lines', 
+                name='20-Day MA',
+                line=dict(color='#f59e0b', width=1.5, dash='dash')
+            ),
+            row=1, col=1
+        )
+
+    if len(stock_df) >= 50:
+        fig.add_trace(
+            scatter_trace(
+                x=chart_ind['Date'], 
+                y=chart_ind['MA50'], 
+                mode='lines', 
+                name='50-Day MA',
+                line=dict(color='#8b5cf6', width=1.5, dash='dot')
+            ),
+            row=1, col=1
+        )
+
+    # Volume chart (vectorized colors, bucketed for long histories)
+    volume_dates, volume_values, colors = volume_bars(
+        stock_df['Date'].to_numpy(),
+        stock_df['Close'].to_numpy(),
+        stock_df['Volume'].to_numpy()
+    )
+
+    fig.add_trace(
+        go.Bar(
+            x=volume_dates, 
+            y=volume_values, 
+            name='Volume',
+            marker_color=colors,
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+
+    fig.update_layout(
+        template=theme['template'],
+        paper_bgcolor=theme['paper_bgcolor'],
+        plot_bgcolor=theme['plot_bgcolor'],
+        font_color=theme['font_color'],
+        height=600,
+        hovermode="x unified",
+        margin=dict(l=0, r=0, t=40, b=0),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    fig.update_xaxes(
+        title_text="Date", 
+        row=2, col=1,
+        gridcolor=theme['grid_color']
+    )
+    fig.update_yaxes(
+        title_text="Price (USD)", 
+        row=1, col=1,
+        gridcolor=theme['grid_color']
+    )
+    fig.update_yaxes(
+        title_text="Volume", 
+        row=2, col=1,
+        gridcolor=theme['grid_color']
+    )
+    return fig
+
+def build_returns_figure(ind_series, theme):
+    """Histogram of daily returns (%)"""
+    fig_returns = go.Figure()
+    # Binned server-side: only 50 bars are sent to the browser
+    fig_returns.add_trace(histogram_bars(
+        ind_series['Returns'].to_numpy() * 100,
+        nbins=50,
+        name='Daily Returns',
+        marker_color='#3b82f6'
+    ))
+    fig_returns.update_layout(
+        title="Daily Returns Distribution (%)",
+        template=theme['template'],
+        paper_bgcolor=theme['paper_bgcolor'],
+        plot_bgcolor=theme['plot_bgcolor'],
+        font_color=theme['font_color'],
+        height=400,
+        showlegend=False,
+        xaxis_title="Return (%)",
+        yaxis_title="Frequency",
+        xaxis=dict(gridcolor=theme['grid_color']),
+        yaxis=dict(gridcolor=theme['grid_color'])
+    )
+    return fig_returns
+
+def build_rsi_figure(ind_series, theme):
+    """14-day RSI with overbought/oversold lines"""
+    rsi_idx = downsample_indices(ind_series['RSI'].to_numpy())
+    fig_rsi = go.Figure()
+    fig_rsi.add_trace(scatter_trace(
+        x=ind_series['Date'].iloc[rsi_idx],
+        y=ind_series['RSI'].iloc[rsi_idx],
+        mode='lines',
+        name='RSI',
+        line=dict(color='#3b82f6', width=2)
+    ))
+    fig_rsi.add_hline(y=70, line_dash="dash", line_color="#ef4444", annotation_text="Overbought")
+    fig_rsi.add_hline(y=30, line_dash="dash", line_color="#10b981", annotation_text="Oversold")
+    fig_rsi.update_layout(
+        title="Relative Strength Index (RSI)",
+        template=theme['template'],
+        paper_bgcolor=theme['paper_bgcolor'],
+        plot_bgcolor=theme['plot_bgcolor'],
+        font_color=theme['font_color'],
+        height=400,
+        yaxis_title="RSI",
+        xaxis_title="Date",
+        xaxis=dict(gridcolor=theme['grid_color']),
+        yaxis=dict(gridcolor=theme['grid_color'])
+    )
+    return fig_rsi
+
+def build_cumulative_figure(ind_series, theme, period):
+    """Cumulative returns over the selected period"""
+    cum_idx = downsample_indices(ind_series['Cumulative_Returns'].to_numpy())
+    fig_cum = go.Figure()
+    fig_cum.add_trace(scatter_trace(
+        x=ind_series['Date'].iloc[cum_idx],
+        y=ind_series['Cumulative_Returns'].iloc[cum_idx] * 100,
+        mode='lines',
+        fill='tozeroy',
+        name='Cumulative Returns',
+        line=dict(color='#3b82f6', width=2),
+        fillcolor='rgba(59, 130, 246, 0.2)'
+    ))
+    fig_cum.update_layout(
+        title=f"Cumulative Returns Over {period}",
+        template=theme['template'],
+        paper_bgcolor=theme['paper_bgcolor'],
+        plot_bgcolor=theme['plot_bgcolor'],
+        font_color=theme['font_color'],
+        height=400,
+        yaxis_title="Cumulative Return (%)",
+        xaxis_title="Date",
+        xaxis=dict(gridcolor=theme['grid_color']),
+        yaxis=dict(gridcolor=theme['grid_color'])
+    )
+    return fig_cum
+
+def build_comparison_figure(stock_df, comparison_df, ticker, comparison_ticker, theme):
+    """Both tickers normalized to 100 at the start of the period"""
+    # Normalize prices for comparison
+    stock_normalized = (stock_df['Close'] / stock_df['Close'].iloc[0]) * 100
+    comparison_normalized = (comparison_df['Close'] / comparison_df['Close'].iloc[0]) * 100
+
+    stock_idx = downsample_indices(stock_normalized.to_numpy())
+    comparison_idx = downsample_indices(comparison_normalized.to_numpy())
+
+    fig_comp = go.Figure()
+    fig_comp.add_trace(scatter_trace(
+        x=stock_df['Date'].iloc[stock_idx],
+        y=stock_normalized.iloc[stock_idx],
+        mode='lines',
+        name=ticker,
+        line=dict(color='#3b82f6', width=2.5)
+    ))
+    fig_comp.add_trace(scatter_trace(
+        x=comparison_df['Date'].iloc[comparison_idx],
+        y=comparison_normalized.iloc[comparison_idx],
+        mode='lines',
+        name=comparison_ticker,
+        line=dict(color='#f59e0b', width=2.5)
+    ))
+    fig_comp.update_layout(
+        title="Normalized Price Comparison (Base = 100)",
+        template=theme['template'],
+        paper_bgcolor=theme['paper_bgcolor'],
+        plot_bgcolor=theme['plot_bgcolor'],
+        font_color=theme['font_color'],
+        height=500,
+        hovermode="x unified",
+        yaxis_title="Normalized Price",
+        xaxis_title="Date",
+        xaxis=dict(gridcolor=theme['grid_color']),
+        yaxis=dict(gridcolor=theme['grid_color'])
+    )
+    return fig_comp
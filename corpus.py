@@ -0,0 +1,166 @@
+import io
+import os
+import threading
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from utils import (resolve_columns, standardize_columns, compute_sentiment,
+                   date_order, sort_by_date)
+from similarity_index import get_similarity_index, register_index, registered_indexes, corpus_version
+from entities import get_ticker_index, register_ticker_index
+
+# ============================================
+# INCREMENTAL CORPUS INGESTION
+# news.csv is append-only in practice. Each call to refresh() stats the
+# file; when it grew, only the appended rows are parsed, scored and
+# added to the similarity index. A shrunk or rewritten file triggers a
+# full reload, as does a file that was replaced (new inode) or whose
+# bytes before the last read position changed. After enough appended rows the TF-IDF vocabulary is
+# refitted so IDF weights do not drift too far from the data. Every
+# engine in use (default plus any a request asked for) is kept current.
+# Rows are kept sorted by Date so time-windowed searches only score
+# the rows inside the window, and a ticker -> row ids index is kept in
+# step with the rows for per-company matching.
+# ============================================
+
+# Refit TF-IDF once the corpus grew by this fraction since the last fit
+REFIT_GROWTH = 0.25
+# Bytes before the read position that must be unchanged for a grown
+# file to count as appended to
+CHECK_BYTES = 4096
+
+
+class Corpus:
+    """A scored, indexed headline corpus kept in sync with a CSV file"""
+
+    def __init__(self, path, refit_growth=REFIT_GROWTH):
+        self.path = path
+        self.refit_growth = refit_growth
+        self.df = None
+        # engine -> similarity index for self.df
+        self.indexes = {}
+        self.tickers = None
+        self._columns = None
+        self._detected = None
+        self._offset = 0
+        self._mtime = None
+        self._identity = None
+        self._checksum = None
+        self._rows_at_fit = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Return the current corpus DataFrame, ingesting new rows first"""
+        stat = os.stat(self.path)
+        if (self.df is not None and stat.st_size == self._offset
+                and stat.st_mtime == self._mtime
+                and (stat.st_dev, stat.st_ino) == self._identity):
+            return self.df
+
+        with self._lock:
+            stat = os.stat(self.path)
+            if (self.df is None or stat.st_size < self._offset
+                    or (stat.st_dev, stat.st_ino) != self._identity):
+                self._full_load()
+            elif stat.st_size > self._offset:
+                self._append()
+            elif stat.st_mtime != self._mtime:
+                # Same size but rewritten in place
+                self._full_load()
+            return self.df
+
+    def _full_load(self):
+        print("🔄 Loading news data (full)...")
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # Parse exactly the bytes read so the offset matches the rows
+            # even if a writer appends meanwhile
+            data = f.read()
+        headline_col, date_col = resolve_columns(self.path)
+        if not date_col:
+            print("⚠️ No date column found. Dates left empty (NaT).")
+        usecols = [headline_col] + ([date_col] if date_col else [])
+        raw = pd.read_csv(io.BytesIO(data), usecols=usecols, dtype=str)
+        df = sort_by_date(compute_sentiment(standardize_columns(raw, headline_col, date_col)))
+        index = get_similarity_index(df)
+        self._publish(df, {index.engine: index}, get_ticker_index(df))
+        self._rows_at_fit = len(df)
+        self._columns = pd.read_csv(io.BytesIO(data), nrows=0).columns.tolist()
+        self._detected = (headline_col, date_col)
+        self._mark(data, len(data), stat)
+        print(f"✅ Loaded {len(df)} news articles")
+
+    def _mark(self, data, offset, stat):
+        """Remember where reading stopped and what the bytes before it were"""
+        self._offset = offset
+        self._checksum = zlib.crc32(data[-CHECK_BYTES:])
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._mtime = stat.st_mtime
+
+    def _append(self):
+        start = max(self._offset - CHECK_BYTES, 0)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            f.seek(start)
+            data = f.read(stat.st_size - start)
+        known, tail = data[:self._offset - start], data[self._offset - start:]
+        if zlib.crc32(known) != self._checksum:
+            # Rewritten and grown: the old rows are not a prefix any more
+            self._full_load()
+            return
+        # Only consume complete lines; a half-written row waits for next time
+        complete = tail.rfind(b"\n") + 1
+        if complete == 0:
+            return
+        text = tail[:complete].decode("utf-8")
+        headline_col, date_col = self._detected
+        usecols = [headline_col] + ([date_col] if date_col else [])
+        raw = pd.read_csv(io.StringIO(text), header=None, names=self._columns,
+                          usecols=usecols, dtype=str)
+        self._mark(data[:self._offset - start + complete], self._offset + complete, stat)
+        if raw.empty:
+            return
+
+        new_rows = compute_sentiment(standardize_columns(raw, headline_col, date_col))
+        df = pd.concat([self.df, new_rows], ignore_index=True)
+        # Usually the new rows are the newest and the order is unchanged
+        order = date_order(df['Date'])
+        reordered = not (order == np.arange(len(order))).all()
+        df = sort_by_date(df, order)
+
+        tickers = self.tickers.extend(new_rows['Headline'].tolist())
+        if reordered:
+            tickers = tickers.take(order)
+
+        grown = len(df) >= self._rows_at_fit * (1 + self.refit_growth)
+        headlines = new_rows['Headline'].fillna("").tolist()
+        indexes = {}
+        # Engines other callers built for this frame are carried forward too
+        for engine, index in {**self.indexes, **registered_indexes(self.df)}.items():
+            if grown and index.refit_on_growth:
+                print(f"🔄 Corpus grew to {len(df)} rows, refitting {engine}...")
+                index = get_similarity_index(df, engine)
+            else:
+                index = index.extend(headlines)
+                if reordered:
+                    index = index.take(order)
+                if grown or (reordered and not index.refit_on_growth):
+                    # Embeddings need no refit; just fold the appended rows into
+                    # the shared file so other processes map them too
+                    index = index.persist(corpus_version(df))
+            indexes[engine] = index
+        if grown:
+            self._rows_at_fit = len(df)
+        self._publish(df, indexes, tickers)
+        print(f"✅ Ingested {len(new_rows)} new headlines ({len(df)} total)")
+
+    def _publish(self, df, indexes, tickers):
+        # Swap everything together so readers never pair a frame with another index
+        for index in indexes.values():
+            register_index(df, index)
+        register_ticker_index(df, tickers)
+        self.df = df
+        self.indexes = indexes
+        self.tickers = tickers
@@ -0,0 +1,108 @@
+import threading
+import weakref
+
+import pandas as pd
+
+from metrics import register_collector
+
+# ============================================
+# SHARED FRAME STORE
+# Price frames are stored once per process and addressed by key. Each
+# session keeps only a lightweight handle. Sessions looking at the same
+# ticker share one copy of the data; when no handle references a frame
+# any more (new analysis, logout, expired session) it is evicted.
+# ============================================
+
+
+class FrameHandle:
+    """A session's reference to a shared frame"""
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        # Released automatically when the session drops the handle
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    @property
+    def frame(self):
+        """
+        The shared data as a shallow copy: adding derived columns only
+        touches this copy (copy-on-write), never the shared frame.
+        Treat existing column values as read-only.
+        """
+        return self.store._get(self.key).copy(deep=False)
+
+    def with_columns(self, **columns):
+        """Shallow copy of the shared frame with extra derived columns"""
+        return self.frame.assign(**columns)
+
+    def release(self):
+        self._finalizer()
+
+    def __repr__(self):
+        return f"FrameHandle({self.key!r})"
+
+
+class FrameStore:
+    """Process-wide, reference-counted store of immutable DataFrames"""
+
+    def __init__(self):
+        self._frames = {}
+        self._refcounts = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, df):
+        """
+        Share `df` under `key` and return a handle to it. If the key is
+        already stored, the existing frame is reused and `df` is dropped.
+        """
+        with self._lock:
+            if key not in self._frames:
+                self._frames[key] = df
+                self._refcounts[key] = 0
+            self._refcounts[key] += 1
+        return FrameHandle(self, key)
+
+    def _get(self, key):
+        with self._lock:
+            return self._frames[key]
+
+    def _release(self, key):
+        with self._lock:
+            count = self._refcounts.get(key)
+            if count is None:
+                return
+            if count <= 1:
+                # Last reference gone: evict
+                del self._refcounts[key]
+                del self._frames[key]
+            else:
+                self._refcounts[key] = count - 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "handles": sum(self._refcounts.values()),
+                "bytes": int(sum(df.memory_usage(deep=False).sum() for df in self._frames.values())),
+            }
+
+
+def price_key(ticker, period, df):
+    """
+    Key identifying one fetched price history. The last bar is hashed in
+    because a refreshed intraday bar keeps its date but not its values.
+    """
+    last_bar = int(pd.util.hash_pandas_object(df.tail(1), index=False).iloc[0])
+    return ("prices", ticker, period, str(df['Date'].iloc[-1]), len(df), last_bar)
+
+
+frame_store = FrameStore()
+register_collector("frame_store", frame_store.stats)
+
+
+def share_prices(ticker, period, df):
+    """Put a price frame in the shared store (None stays None)"""
+    if df is None or df.empty:
+        return None
+    return frame_store.put(price_key(ticker, period, df), df)
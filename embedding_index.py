@@ -0,0 +1,205 @@
+import os
+import uuid
+import weakref
+
+import numpy as np
+
+from cache import cache_path, prune_versions
+from model_registry import registry, get_embedding_model
+from similarity_index import top_k_in_rows, top_k_rows
+
+# ============================================
+# DENSE EMBEDDING SIMILARITY INDEX
+# The corpus is embedded once with a sentence-embedding model and stored
+# as an (n_rows x dim) float16 .npy file. Every process memory-maps the
+# same file, so worker processes share one copy through the OS page
+# cache instead of each holding its own. A query is one matrix-vector
+# product against the normalized rows (cosine similarity).
+# ============================================
+
+# Texts embedded per model call while building the matrix
+EMBED_CHUNK = 8192
+# Corpus rows upcast to float32 per product (BLAS has no float16 kernels)
+SCORE_BLOCK_ROWS = 65_536
+# Corpus versions kept on disk (same policy as similarity_index)
+_MAX_ON_DISK = 2
+
+
+def _matrix_path(version):
+    spec = registry.spec("embedding")
+    safe_name = f"{spec.model_name}@{spec.version}".replace("/", "--")
+    return cache_path("similarity", f"embed-{safe_name}-{version}.npy")
+
+
+def _prune():
+    prune_versions(_matrix_path("*"), keep=_MAX_ON_DISK)
+
+
+def _embed(headlines):
+    return get_embedding_model()(headlines, batch_size=registry.spec("embedding").batch_size)
+
+
+class EmbeddingIndex:
+    """Memory-mapped float16 sentence embeddings plus rows appended since"""
+
+    engine = "embedding"
+    # An embedding does not depend on the rest of the corpus; appended rows
+    # are folded into a new file instead of re-embedding everything
+    refit_on_growth = False
+
+    def __init__(self, vectors, tail=None, scratch_path=None):
+        self.vectors = vectors
+        self.tail = tail if tail is not None else np.empty((0, vectors.shape[1]), dtype=np.float16)
+        # Private file behind `vectors` (from take()), renamed into place by save()
+        self.scratch_path = scratch_path
+
+    @classmethod
+    def open(cls, path):
+        """Map an embedding matrix written by build() (read-only, shared)"""
+        return cls(np.load(path, mmap_mode="r"))
+
+    @classmethod
+    def build(cls, headlines, path):
+        """Embed the headlines into a new .npy file at path and map it"""
+        dimension = _embed(headlines[:1] or [""]).shape[1]
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16,
+                                        shape=(len(headlines), dimension))
+        for start in range(0, len(headlines), EMBED_CHUNK):
+            out[start:start + EMBED_CHUNK] = _embed(headlines[start:start + EMBED_CHUNK])
+        out.flush()
+        del out
+        # Atomic replace so concurrent replicas never map a partial file
+        os.replace(tmp_path, path)
+        return cls.open(path)
+
+    def __len__(self):
+        return self.vectors.shape[0] + self.tail.shape[0]
+
+    def extend(self, headlines):
+        """New index with extra rows appended (kept in memory until save())"""
+        new_rows = _embed(headlines).astype(np.float16)
+        return EmbeddingIndex(self.vectors, np.vstack([self.tail, new_rows]))
+
+    def save(self, path):
+        """Write mapped + appended rows to one file and map that instead"""
+        if self.scratch_path is not None and not len(self.tail) and os.path.exists(self.scratch_path):
+            # Already a complete file of our own: publish it without copying
+            os.replace(self.scratch_path, path)
+            return EmbeddingIndex.open(path)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float16,
+                                        shape=(len(self), self.vectors.shape[1]))
+        for start in range(0, self.vectors.shape[0], SCORE_BLOCK_ROWS):
+            out[start:start + SCORE_BLOCK_ROWS] = self.vectors[start:start + SCORE_BLOCK_ROWS]
+        out[self.vectors.shape[0]:] = self.tail
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+        return EmbeddingIndex.open(path)
+
+    def take(self, order):
+        """
+        New index with rows reordered, written block by block to a private
+        mapped file so the shared matrix is never copied into this
+        process's memory (persist() to share it again)
+        """
+        order = np.asarray(order)
+        mapped = self.vectors.shape[0]
+        path = cache_path("similarity", f"reorder-{uuid.uuid4().hex}.tmp.npy")
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float16,
+                                        shape=(len(order), self.vectors.shape[1]))
+        for start in range(0, len(order), SCORE_BLOCK_ROWS):
+            rows = order[start:start + SCORE_BLOCK_ROWS]
+            from_file = rows < mapped
+            block = np.empty((len(rows), self.vectors.shape[1]), dtype=np.float16)
+            block[from_file] = self.vectors[rows[from_file]]
+            block[~from_file] = self.tail[rows[~from_file] - mapped]
+            out[start:start + len(rows)] = block
+        out.flush()
+        del out
+        index = EmbeddingIndex(np.load(path, mmap_mode="r"), scratch_path=path)
+        # Removed with the index unless save() renamed it into place first
+        weakref.finalize(index, _remove_quietly, path)
+        return index
+
+    def _blocks(self, rows=None):
+        """(vectors, out_offset) pieces covering `rows` of the corpus"""
+        if rows is not None and not isinstance(rows, slice):
+            # Row ids: gather only those rows (touches only their pages)
+            rows = np.asarray(rows)
+            split = np.searchsorted(rows, self.vectors.shape[0]) if len(self.tail) else len(rows)
+            yield self.vectors[rows[:split]], 0
+            if split < len(rows):
+                yield self.tail[rows[split:] - self.vectors.shape[0]], split
+            return
+        start, stop, _ = (rows or slice(None)).indices(len(self))
+        mapped = self.vectors.shape[0]
+        if start < mapped:
+            yield self.vectors[start:min(stop, mapped)], 0
+        if stop > mapped:
+            yield self.tail[max(start - mapped, 0):stop - mapped], max(mapped - start, 0)
+
+    def _row_count(self, rows):
+        if rows is None:
+            return len(self)
+        if isinstance(rows, slice):
+            return len(range(*rows.indices(len(self))))
+        return len(rows)
+
+    def _score_queries(self, queries, rows=None):
+        """(len(queries) x rows) cosine similarities"""
+        out = np.empty((queries.shape[0], self._row_count(rows)), dtype=np.float32)
+        queries_t = queries.T
+        for vectors, offset in self._blocks(rows):
+            for start in range(0, vectors.shape[0], SCORE_BLOCK_ROWS):
+                block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+                out[:, offset + start:offset + start + block.shape[0]] = (block @ queries_t).T
+        return out
+
+    def scores(self, headline, rows=None):
+        """Cosine similarity of the headline against every corpus row (or only `rows`)"""
+        return self._score_queries(_embed([headline]), rows)[0]
+
+    def top_k(self, headline, k=10, rows=None):
+        """Row positions and scores of the k best matches, best first"""
+        return top_k_in_rows(self.scores(headline, rows), k, rows)
+
+    def top_k_many(self, headlines, k=10, block_size=256):
+        """Top-k matches for many headlines, as (positions, scores) arrays"""
+        k = min(k, len(self))
+        n = len(headlines)
+        positions = np.empty((n, k), dtype=np.intp)
+        scores = np.empty((n, k), dtype=np.float64)
+        if n == 0 or k == 0:
+            return positions, scores
+        for start in range(0, n, block_size):
+            block = self._score_queries(_embed(headlines[start:start + block_size]))
+            top, top_scores = top_k_rows(block, k)
+            positions[start:start + len(block)] = top
+            scores[start:start + len(block)] = top_scores
+        return positions, scores
+
+    def persist(self, version):
+        """Save under the path for corpus `version` so other processes map it"""
+        index = self.save(_matrix_path(version))
+        _prune()
+        return index
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def load_or_embed(version, headlines):
+    """Map the stored embeddings for this corpus version, embedding them on first use"""
+    path = _matrix_path(version)
+    if os.path.exists(path):
+        return EmbeddingIndex.open(path)
+    print(f"🔄 Embedding {len(headlines)} headlines for semantic search...")
+    index = EmbeddingIndex.build(headlines, path)
+    _prune()
+    return index
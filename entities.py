@@ -0,0 +1,251 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from similarity_index import corpus_version
+
+# ============================================
+# COMPANY / TICKER ENTITIES
+# A hand-kept alias map (company names as they appear in headlines ->
+# ticker) compiled into one regex, and an inverted index ticker -> row
+# ids built when the corpus is ingested. Similarity search and news
+# lookups for a ticker then touch only that ticker's rows.
+# ============================================
+
+# Ticker (as typed into the app / yfinance) -> names used in headlines.
+# Names are matched case-sensitively on word boundaries, longest first.
+TICKER_ALIASES = {
+    # US
+    "AAPL": ["Apple", "Apple Inc", "iPhone maker"],
+    "MSFT": ["Microsoft"],
+    "NVDA": ["NVIDIA", "Nvidia"],
+    "AMZN": ["Amazon", "AWS"],
+    "GOOGL": ["Alphabet", "Google"],
+    "META": ["Meta Platforms", "Meta", "Facebook"],
+    "TSLA": ["Tesla"],
+    "INTC": ["Intel"],
+    "AMD": ["Advanced Micro Devices"],
+    "NFLX": ["Netflix"],
+    "BRK-B": ["Berkshire Hathaway", "Berkshire"],
+    "JPM": ["JPMorgan", "JP Morgan", "JPMorgan Chase"],
+    "BAC": ["Bank of America"],
+    "GS": ["Goldman Sachs"],
+    "MS": ["Morgan Stanley"],
+    "WFC": ["Wells Fargo"],
+    "C": ["Citigroup", "Citibank"],
+    "AXP": ["American Express"],
+    "BLK": ["BlackRock"],
+    "SCHW": ["Charles Schwab"],
+    "COIN": ["Coinbase"],
+    "PYPL": ["PayPal"],
+    "XYZ": ["Block Inc"],
+    "BA": ["Boeing"],
+    "F": ["Ford", "Ford Motor"],
+    "GM": ["General Motors"],
+    "XOM": ["Exxon", "ExxonMobil", "Exxon Mobil"],
+    "CVX": ["Chevron"],
+    "JNJ": ["Johnson and Johnson", "Johnson & Johnson"],
+    "PFE": ["Pfizer"],
+    "KO": ["Coca Cola", "Coca-Cola"],
+    "PG": ["Procter and Gamble", "Procter & Gamble"],
+    "SBUX": ["Starbucks"],
+    "HD": ["Home Depot"],
+    "WMT": ["Walmart"],
+    "DIS": ["Disney"],
+    # International ADRs / listings
+    "TM": ["Toyota"],
+    "SONY": ["Sony"],
+    "BABA": ["Alibaba"],
+    "TCEHY": ["Tencent"],
+    "SHEL": ["Shell"],
+    "2222.SR": ["Saudi Aramco", "Aramco"],
+    "005930.KS": ["Samsung Electronics", "Samsung"],
+    # India (NSE)
+    "RELIANCE.NS": ["Reliance Industries", "Reliance Jio", "Reliance"],
+    "JIOFIN.NS": ["Jio Financial Services", "Jio Financial"],
+    "HDFCBANK.NS": ["HDFC Bank"],
+    "ICICIBANK.NS": ["ICICI Bank"],
+    "SBIN.NS": ["State Bank of India", "SBI"],
+    "AXISBANK.NS": ["Axis Bank"],
+    "KOTAKBANK.NS": ["Kotak Mahindra Bank", "Kotak"],
+    "INDUSINDBK.NS": ["IndusInd Bank"],
+    "BANDHANBNK.NS": ["Bandhan Bank"],
+    "BANKBARODA.NS": ["Bank of Baroda"],
+    "TCS.NS": ["Tata Consultancy Services", "TCS"],
+    "INFY.NS": ["Infosys"],
+    "WIPRO.NS": ["Wipro"],
+    "TECHM.NS": ["Tech Mahindra"],
+    "M&M.NS": ["Mahindra and Mahindra", "Mahindra & Mahindra"],
+    "TATAMOTORS.NS": ["Tata Motors"],
+    "ADANIENT.NS": ["Adani Group", "Adani Enterprises", "Adani"],
+    "IOC.NS": ["Indian Oil Corporation", "Indian Oil"],
+    "ONGC.NS": ["ONGC"],
+    "NTPC.NS": ["NTPC"],
+    "COALINDIA.NS": ["Coal India"],
+    "BHARTIARTL.NS": ["Bharti Airtel", "Airtel"],
+    "PAYTM.NS": ["Paytm", "PayTM"],
+    "ASIANPAINT.NS": ["Asian Paints"],
+    "NESTLEIND.NS": ["Nestle India"],
+    "LICI.NS": ["LIC of India", "LIC"],
+    "DRREDDY.NS": ["Dr Reddy's Laboratories", "Dr Reddy's"],
+    "SUNPHARMA.NS": ["Sun Pharmaceutical", "Sun Pharma"],
+    "CIPLA.NS": ["Cipla"],
+    "ULTRACEMCO.NS": ["UltraTech Cement", "UltraTech"],
+    "HINDALCO.NS": ["Hindalco Industries", "Hindalco"],
+    "VEDL.NS": ["Vedanta"],
+}
+
+# Names that contain an alias but are a different entity; they win the
+# match (longest first) and map to no ticker
+NON_COMPANY_NAMES = [
+    "Reserve Bank of India",
+    "Apple Valley",
+]
+
+# Bare symbols are matched too when long enough not to be ordinary words
+_MIN_BARE_SYMBOL = 4
+
+
+def _build_alias_map():
+    alias_to_ticker = {}
+    for ticker, names in TICKER_ALIASES.items():
+        for name in names:
+            alias_to_ticker[name] = ticker
+        symbol = ticker.split(".")[0]
+        if len(symbol) >= _MIN_BARE_SYMBOL and symbol.isalpha():
+            alias_to_ticker.setdefault(symbol, ticker)
+    for name in NON_COMPANY_NAMES:
+        alias_to_ticker[name] = None
+    return alias_to_ticker
+
+
+ALIAS_TO_TICKER = _build_alias_map()
+
+_ALIAS_PATTERN = re.compile(
+    r"(?<![\w$])(" + "|".join(
+        re.escape(alias) for alias in sorted(ALIAS_TO_TICKER, key=len, reverse=True)
+    ) + r")(?!\w)"
+)
+# Cashtags like $TSLA or $RELIANCE.NS work for any ticker
+_CASHTAG_PATTERN = re.compile(r"\$([A-Z][A-Z0-9&-]{0,11}(?:\.[A-Z]{1,3})?)\b")
+
+
+def canonical_ticker(ticker):
+    """Map what a user typed ("tsla", "RELIANCE", "INFY.BO") to an index key"""
+    ticker = (ticker or "").strip().upper()
+    if not ticker or ticker in TICKER_ALIASES:
+        return ticker
+    base = ticker.split(".")[0]
+    for candidate in (base, f"{base}.NS"):
+        if candidate in TICKER_ALIASES:
+            return candidate
+    return ticker
+
+
+def tickers_in(headline):
+    """Sorted tickers mentioned in one headline"""
+    found = {ALIAS_TO_TICKER[name] for name in _ALIAS_PATTERN.findall(headline)}
+    found.update(canonical_ticker(tag) for tag in _CASHTAG_PATTERN.findall(headline))
+    found.discard(None)
+    return sorted(found)
+
+
+def _mentions(headlines, offset=0):
+    """(ticker, row id) pairs for every mention in headlines"""
+    text = pd.Series(headlines, dtype=object).fillna("").astype(str)
+    pairs = []
+    for pattern, to_ticker in ((_ALIAS_PATTERN, ALIAS_TO_TICKER.get),
+                               (_CASHTAG_PATTERN, canonical_ticker)):
+        found = text.str.findall(pattern).explode().dropna()
+        if found.empty:
+            continue
+        tickers = found.map(to_ticker)
+        keep = tickers.notna()
+        pairs.append(pd.DataFrame({
+            "ticker": tickers[keep].to_numpy(),
+            "row": found.index[keep].to_numpy() + offset,
+        }))
+    if not pairs:
+        return pd.DataFrame({"ticker": [], "row": []})
+    return pd.concat(pairs, ignore_index=True)
+
+
+class TickerIndex:
+    """Inverted index: ticker -> sorted array of corpus row ids"""
+
+    def __init__(self, rows=None, size=0):
+        self._rows = rows or {}
+        self.size = size
+
+    @classmethod
+    def build(cls, headlines):
+        return cls(cls._group(_mentions(headlines)), len(headlines))
+
+    @staticmethod
+    def _group(mentions):
+        return {
+            ticker: np.unique(group.to_numpy(dtype=np.int64))
+            for ticker, group in mentions.groupby("ticker")["row"]
+        }
+
+    def __contains__(self, ticker):
+        return canonical_ticker(ticker) in self._rows
+
+    def __len__(self):
+        return self.size
+
+    def rows(self, ticker):
+        """Row ids mentioning ticker (empty array if none)"""
+        return self._rows.get(canonical_ticker(ticker), np.empty(0, dtype=np.int64))
+
+    def counts(self):
+        """{ticker: number of headlines}, most mentioned first"""
+        return dict(sorted(((t, len(r)) for t, r in self._rows.items()), key=lambda item: -item[1]))
+
+    def extend(self, headlines):
+        """New index with rows appended after the current ones"""
+        rows = dict(self._rows)
+        for ticker, new_rows in self._group(_mentions(headlines, offset=self.size)).items():
+            old = rows.get(ticker)
+            rows[ticker] = new_rows if old is None else np.concatenate([old, new_rows])
+        return TickerIndex(rows, self.size + len(headlines))
+
+    def take(self, order):
+        """New index for a corpus reordered so that new row i = old row order[i]"""
+        new_position = np.empty(len(order), dtype=np.int64)
+        new_position[order] = np.arange(len(order))
+        return TickerIndex({t: np.sort(new_position[r]) for t, r in self._rows.items()}, self.size)
+
+
+# ============================================
+# PER-CORPUS CACHE (same policy as similarity_index)
+# ============================================
+
+_MAX_IN_MEMORY = 2
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def register_ticker_index(news_df, index):
+    """Make `index` the ticker index for this exact corpus frame"""
+    version = corpus_version(news_df)
+    with _lock:
+        _indexes[version] = index
+        while len(_indexes) > _MAX_IN_MEMORY:
+            _indexes.pop(next(iter(_indexes)))
+
+
+def get_ticker_index(news_df):
+    """Return the ticker index for this corpus, building it on first use"""
+    version = corpus_version(news_df)
+    with _lock:
+        index = _indexes.get(version)
+        if index is None:
+            index = TickerIndex.build(news_df['Headline'].tolist())
+            _indexes[version] = index
+            while len(_indexes) > _MAX_IN_MEMORY:
+                _indexes.pop(next(iter(_indexes)))
+    return index
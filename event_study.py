@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache
+from metrics import span, register_collector
+from price_store import price_store, period_start, PERIOD_OFFSETS
+
+# ============================================
+# EVENT STUDY
+# What did the price do after each matched historical headline?
+# Day 0 is the first trading session on or after the headline date and
+# the base price is the close before it, so +1d includes the reaction on
+# the day itself. Abnormal return = ticker return - benchmark return
+# (market-adjusted model). All events are computed in one vectorized
+# pass over a single cached price history per ticker.
+# ============================================
+
+HORIZONS = (1, 5, 20)
+BENCHMARK_TICKER = os.environ.get("EVENT_STUDY_BENCHMARK", "SPY")
+
+# Periods to try (shortest first) before falling back to "max"
+_COVERING_PERIODS = ("1mo", "3mo", "6mo", "1y", "2y", "5y", "10y")
+
+# (ticker, benchmark, event date, horizons) -> row of returns. Recent
+# events get new bars every day, so entries expire
+_event_cache = TTLCache(maxsize=50_000, ttl=6 * 3600)
+
+
+def covering_period(earliest):
+    """Shortest price_store period that starts before `earliest` (plus a margin)"""
+    if earliest is None or pd.isna(earliest):
+        return "1y"
+    needed = pd.Timestamp(earliest) - pd.DateOffset(days=10)
+    for period in _COVERING_PERIODS:
+        if period in PERIOD_OFFSETS and period_start(period) <= needed:
+            return period
+    return "max"
+
+
+def _closes(ticker, period):
+    """(session dates as naive datetime64[ns], closes) from the price store"""
+    df = price_store.history(ticker, period)
+    if df is None or df.empty:
+        return None, None
+    dates = pd.to_datetime(df['Date'])
+    if getattr(dates.dt, "tz", None) is not None:
+        # Session dates in the exchange's own timezone
+        dates = dates.dt.tz_localize(None)
+    return dates.dt.normalize().to_numpy(dtype='datetime64[ns]'), df['Close'].to_numpy(dtype=float)
+
+
+def forward_returns(dates, closes, event_dates, horizons=HORIZONS):
+    """
+    (len(event_dates) x len(horizons)) returns after each event, NaN where
+    the window runs past the available history (or the event predates it).
+    """
+    event_dates = np.asarray(event_dates, dtype='datetime64[ns]')
+    out = np.full((len(event_dates), len(horizons)), np.nan)
+    if dates is None or len(dates) == 0 or len(event_dates) == 0:
+        return out
+    day0 = np.searchsorted(dates, event_dates, side='left')
+    base = day0 - 1
+    valid_base = (base >= 0) & ~np.isnat(event_dates)
+    base_close = closes[np.clip(base, 0, len(closes) - 1)]
+    for column, horizon in enumerate(horizons):
+        end = base + horizon
+        ok = valid_base & (end < len(closes))
+        out[ok, column] = closes[end[ok]] / base_close[ok] - 1
+    return out
+
+
+def event_study(ticker, event_dates, horizons=HORIZONS, benchmark=BENCHMARK_TICKER):
+    """
+    Returns after each event date for `ticker`, its benchmark and the
+    difference: columns ret_{h}d, bench_{h}d and abn_{h}d, one row per
+    event in input order. Results are memoized per (ticker, date).
+    """
+    horizons = tuple(horizons)
+    events = pd.to_datetime(pd.Series(event_dates), errors='coerce')
+    if getattr(events.dt, "tz", None) is not None:
+        events = events.dt.tz_localize(None)
+    events = events.dt.normalize()
+    columns = ([f"ret_{h}d" for h in horizons] + [f"bench_{h}d" for h in horizons]
+               + [f"abn_{h}d" for h in horizons])
+
+    keys = [(ticker, benchmark, date, horizons) for date in events]
+    rows = [_event_cache.get(key) for key in keys]
+    missing = sorted({key[2] for key, row in zip(keys, rows) if row is None and not pd.isna(key[2])})
+
+    if missing:
+        with span("events.compute"):
+            period = covering_period(missing[0])
+            missing_dates = np.array(missing, dtype='datetime64[ns]')
+            ticker_returns = forward_returns(*_closes(ticker, period), missing_dates, horizons)
+            if benchmark and benchmark != ticker:
+                bench_returns = forward_returns(*_closes(benchmark, period), missing_dates, horizons)
+            else:
+                bench_returns = np.zeros_like(ticker_returns)
+            computed = np.hstack([ticker_returns, bench_returns, ticker_returns - bench_returns])
+            for date, values in zip(missing, computed):
+                _event_cache.set((ticker, benchmark, date, horizons), values)
+        rows = [_event_cache.get(key) for key in keys]
+
+    empty = np.full(len(columns), np.nan)
+    values = np.vstack([row if row is not None else empty for row in rows]) if rows else np.empty((0, len(columns)))
+    return pd.DataFrame(values, columns=columns, index=pd.Series(event_dates).index)
+
+
+def summarize(study, horizons=HORIZONS):
+    """Mean/median abnormal return and share of positive moves per horizon"""
+    summary = {}
+    for horizon in horizons:
+        abnormal = study[f"abn_{horizon}d"].dropna()
+        raw = study.loc[abnormal.index, f"ret_{horizon}d"]
+        summary[f"{horizon}d"] = {
+            "events": int(len(abnormal)),
+            "mean_return": float(raw.mean()) if len(abnormal) else None,
+            "mean_abnormal": float(abnormal.mean()) if len(abnormal) else None,
+            "median_abnormal": float(abnormal.median()) if len(abnormal) else None,
+            "positive_share": float((abnormal > 0).mean()) if len(abnormal) else None,
+        }
+    return summary
+
+
+def event_cache_stats():
+    return _event_cache.stats()
+
+
+register_collector("event_cache", event_cache_stats)
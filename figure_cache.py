@@ -0,0 +1,34 @@
+from cache import TTLCache
+from metrics import span, register_collector
+
+# ============================================
+# PLOTLY FIGURE CACHE
+# Every widget interaction reruns the whole script. Figures are keyed by
+# the shared-store key of the data they plot plus the theme, and the
+# built go.Figure is kept: st.plotly_chart passes a Figure through
+# as-is, so a rerun that changes nothing neither rebuilds traces nor
+# re-validates a dict.
+# ============================================
+
+_figures = TTLCache(maxsize=256, ttl=3600)
+
+
+def cached_figure(key, build):
+    """
+    Return the figure for `key`, calling build() only on a miss.
+    `key` should include the data's store key(s), theme and any title inputs.
+    The figure is shared between sessions: treat it as read-only.
+    """
+    figure = _figures.get(key)
+    if figure is None:
+        with span("render.figure_build"):
+            figure = build()
+        _figures.set(key, figure)
+    return figure
+
+
+def figure_cache_stats():
+    return _figures.stats()
+
+
+register_collector("figure_cache", figure_cache_stats)
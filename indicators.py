@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache
+from data_store import price_key
+
+# ============================================
+# TECHNICAL INDICATOR ENGINE
+# Everything the Market Impact and Technical Analysis tabs show, computed
+# in one vectorized pass over the close/high/low/volume arrays. Rolling
+# windows come from shared cumulative sums instead of repeated rolling()
+# calls. Results are cached per (ticker, period, last bar) so theme
+# toggles and tab switches reuse them.
+# ============================================
+
+TRADING_DAYS = 252
+
+_cache = TTLCache(maxsize=256, ttl=6 * 3600)
+
+
+def _window_sums(cumsum, window):
+    """Sum over each trailing window (NaN until the window is full)"""
+    out = np.full(len(cumsum) - 1, np.nan)
+    if len(out) >= window:
+        out[window - 1:] = cumsum[window:] - cumsum[:-window]
+    return out
+
+
+def _rolling_sums(values, window):
+    """
+    Trailing-window sums like rolling(window).sum(): NaN until the window
+    is full and for windows holding a NaN, but only those windows
+    """
+    valid = ~np.isnan(values)
+    sums = _window_sums(np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0)))), window)
+    counts = _window_sums(np.concatenate(([0], np.cumsum(valid))), window)
+    sums[counts < window] = np.nan
+    return sums
+
+
+def compute_indicators(df):
+    """
+    Compute every indicator for an OHLCV frame (needs Date/Close/High/Low/Volume).
+    Returns a dict with a per-bar 'series' DataFrame and scalar summary values.
+    Matches the pandas rolling()/pct_change() definitions the app used before.
+    """
+    close = df['Close'].to_numpy(dtype=np.float64)
+    high = df['High'].to_numpy(dtype=np.float64)
+    low = df['Low'].to_numpy(dtype=np.float64)
+    volume = df['Volume'].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    # Shift by the first price before summing squares to limit cancellation
+    finite = close[~np.isnan(close)]
+    base = finite[0] if len(finite) else 0.0
+    shifted = close - base
+
+    ma20 = _rolling_sums(shifted, 20) / 20 + base
+    ma50 = _rolling_sums(shifted, 50) / 50 + base
+    # Sample (ddof=1) standard deviation over 20 bars, like rolling().std()
+    s1 = _rolling_sums(shifted, 20)
+    var20 = (_rolling_sums(shifted * shifted, 20) - s1 * s1 / 20) / 19
+    std20 = np.sqrt(np.clip(var20, 0.0, None))
+
+    # Returns / cumulative returns (NaN next to a missing close, like pct_change)
+    returns = np.full(n, np.nan)
+    delta = np.full(n, np.nan)
+    if n > 1:
+        returns[1:] = close[1:] / close[:-1] - 1
+        delta[1:] = close[1:] - close[:-1]
+    # (1 + returns).cumprod() - 1: missing returns are skipped, not propagated
+    cumulative = np.nancumprod(1 + returns) - 1
+    cumulative[np.isnan(returns)] = np.nan
+
+    # RSI (14) with simple moving averages of gains and losses
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    avg_gain = _rolling_sums(gains, 14) / 14
+    avg_loss = _rolling_sums(losses, 14) / 14
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    valid_returns = returns[~np.isnan(returns)]
+    mean_return = valid_returns.mean() if len(valid_returns) else np.nan
+    daily_volatility = valid_returns.std(ddof=1) if len(valid_returns) > 1 else np.nan
+    sharpe = (mean_return / daily_volatility * TRADING_DAYS ** 0.5) if daily_volatility else 0
+
+    current = close[-1] if n else np.nan
+    # fmax skips NaN like cummax()
+    running_max = np.fmax.accumulate(close) if n else close
+    ma20_last = ma20[-1] if n else np.nan
+
+    series = pd.DataFrame({
+        'Date': df['Date'].to_numpy(),
+        'MA20': ma20,
+        'MA50': ma50,
+        'Upper_Band': ma20 + 2 * std20,
+        'Lower_Band': ma20 - 2 * std20,
+        'Returns': returns,
+        'Cumulative_Returns': cumulative,
+        'RSI': rsi,
+    })
+
+    return {
+        'series': series,
+        'current_price': current,
+        'first_price': close[0] if n else np.nan,
+        'period_change_pct': (current / close[0] - 1) * 100 if n else np.nan,
+        # nan* reductions skip missing bars like the pandas ones
+        'high': np.nanmax(high) if n else np.nan,
+        'low': np.nanmin(low) if n else np.nan,
+        'high_52w': np.nanmax(high[-TRADING_DAYS:]) if n else np.nan,
+        'low_52w': np.nanmin(low[-TRADING_DAYS:]) if n else np.nan,
+        'avg_volume': np.nanmean(volume) if n else np.nan,
+        'upper_band': series['Upper_Band'].iloc[-1] if n else np.nan,
+        'lower_band': series['Lower_Band'].iloc[-1] if n else np.nan,
+        'daily_volatility': daily_volatility,
+        'sharpe_ratio': sharpe,
+        'max_drawdown_pct': np.nanmin(close / running_max - 1) * 100 if n else np.nan,
+        'momentum_5d': (current / close[-6] - 1) * 100 if n >= 6 else 0,
+        'momentum_20d': (current / close[-21] - 1) * 100 if n >= 21 else 0,
+        'ma_20': ma20_last,
+        'ma_50': ma50[-1] if n >= 50 else ma20_last,
+    }
+
+
+def get_indicators(ticker, period, df):
+    """Cached compute_indicators, keyed by (ticker, period, last bar date and values)"""
+    if df is None or df.empty:
+        return None
+    # Same key as the shared frame: a refreshed last bar (new close) misses
+    key = price_key(ticker, period, df)
+    indicators = _cache.get(key)
+    if indicators is None:
+        indicators = compute_indicators(df)
+        _cache.set(key, indicators)
+    return indicators
@@ -0,0 +1,182 @@
+import os
+import time
+
+from transformers import AutoTokenizer, pipeline
+
+from cache import cache_path
+
+# ============================================
+# SENTIMENT INFERENCE BACKENDS
+# "torch" : the plain PyTorch transformers pipeline (reference)
+# "onnx"  : the same checkpoint exported to ONNX Runtime with dynamic
+#           int8 quantization - much cheaper on CPU-only servers
+# Both return a transformers pipeline, so callers keep the same call
+# shape: model(texts, truncation=True, max_length=512).
+# ============================================
+
+BACKENDS = ("torch", "onnx")
+
+
+def backend_tag(backend):
+    """Suffix for cache keys: quantized scores differ slightly from PyTorch"""
+    return "" if backend == "torch" else f"+{backend}-int8"
+
+
+def _onnx_dir(model_name, revision):
+    safe_name = f"{model_name}@{revision}".replace("/", "--")
+    return os.path.dirname(cache_path("onnx", safe_name, "model_quantized.onnx"))
+
+
+def _load_onnx_pipeline(model_name, revision, num_threads=None):
+    # optimum is optional - only needed when the ONNX backend is selected
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise ImportError(
+            "The 'onnx' backend needs optimum[onnxruntime]: pip install 'optimum[onnxruntime]'"
+        ) from e
+
+    model_dir = _onnx_dir(model_name, revision)
+    quantized_path = os.path.join(model_dir, "model_quantized.onnx")
+
+    if not os.path.exists(quantized_path):
+        print("🔄 Exporting sentiment model to ONNX and quantizing to int8 (first time only)...")
+        ort_model = ORTModelForSequenceClassification.from_pretrained(
+            model_name, revision=revision, export=True
+        )
+        ort_model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name, revision=revision).save_pretrained(model_dir)
+
+        quantizer = ORTQuantizer.from_pretrained(model_dir)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=model_dir, quantization_config=qconfig)
+
+    session_options = None
+    if num_threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+    ort_model = ORTModelForSequenceClassification.from_pretrained(
+        model_dir, file_name="model_quantized.onnx", session_options=session_options
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("sentiment-analysis", model=ort_model, tokenizer=tokenizer)
+
+
+def load_pipeline(model_name, revision="main", backend="torch", num_threads=None):
+    """
+    Load a sentiment-analysis pipeline for the selected backend.
+    num_threads only applies to ONNX Runtime here; PyTorch threads are
+    process-wide and set by the model registry.
+    """
+    if backend == "torch":
+        return pipeline("sentiment-analysis", model=model_name, revision=revision)
+    if backend == "onnx":
+        return _load_onnx_pipeline(model_name, revision, num_threads)
+    raise ValueError(f"Unknown sentiment backend '{backend}'. Choose one of {BACKENDS}")
+
+
+# ============================================
+# SENTENCE EMBEDDINGS (dense similarity engine)
+# Wrapped so the registry can load and warm it up like the pipelines:
+# embedder(texts) -> float32 array of L2-normalized rows.
+# ============================================
+
+class SentenceEmbedder:
+    """Callable wrapper around a sentence-transformers model"""
+
+    def __init__(self, model, batch_size=64):
+        self.model = model
+        self.batch_size = batch_size
+        self.dimension = model.get_sentence_embedding_dimension()
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        # truncation/max_length are accepted for call-shape compatibility;
+        # sentence-transformers truncates to the model's max_seq_length
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        return self.model.encode(
+            texts, batch_size=batch_size or self.batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False
+        ).astype("float32", copy=False)
+
+
+def load_sentence_embedder(model_name, revision="main", backend="torch", num_threads=None):
+    """Load a sentence-transformers model (only the torch backend is supported)"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise ImportError(
+            "The 'embedding' similarity engine needs sentence-transformers: "
+            "pip install sentence-transformers"
+        ) from e
+    if backend != "torch":
+        raise ValueError("Sentence embeddings only support the 'torch' backend")
+    return SentenceEmbedder(SentenceTransformer(model_name, revision=revision, device="cpu"))
+
+
+# ============================================
+# PARITY CHECK
+# ============================================
+
+def parity_report(headlines, model_name, revision="main", reference="torch", candidate="onnx"):
+    """
+    Score the same headlines on two backends and report how far they diverge:
+    label agreement, absolute score differences and per-backend throughput.
+    """
+    headlines = [h if str(h).strip() else "neutral news" for h in headlines]
+    outputs = {}
+    timings = {}
+    for backend in (reference, candidate):
+        model = load_pipeline(model_name, revision, backend)
+        start = time.perf_counter()
+        outputs[backend] = model(headlines, truncation=True, max_length=512)
+        timings[backend] = time.perf_counter() - start
+
+    ref_results = outputs[reference]
+    cand_results = outputs[candidate]
+    label_matches = 0
+    score_diffs = []
+    disagreements = []
+    for headline, ref, cand in zip(headlines, ref_results, cand_results):
+        if ref['label'] == cand['label']:
+            label_matches += 1
+            score_diffs.append(abs(ref['score'] - cand['score']))
+        else:
+            disagreements.append({
+                "headline": headline,
+                reference: f"{ref['label']} {ref['score']:.3f}",
+                candidate: f"{cand['label']} {cand['score']:.3f}",
+            })
+
+    n = len(headlines)
+    return {
+        "n": n,
+        "label_agreement": label_matches / n if n else 1.0,
+        "max_score_diff": max(score_diffs) if score_diffs else 0.0,
+        "mean_score_diff": sum(score_diffs) / len(score_diffs) if score_diffs else 0.0,
+        f"{reference}_headlines_per_s": n / timings[reference] if timings[reference] else None,
+        f"{candidate}_headlines_per_s": n / timings[candidate] if timings[candidate] else None,
+        "disagreements": disagreements[:20],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    import pandas as pd
+
+    from model_registry import SENTIMENT_MODEL, SENTIMENT_MODEL_REVISION
+
+    parser = argparse.ArgumentParser(description="Compare sentiment backends on sample headlines")
+    parser.add_argument("--csv", default="news.csv")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--model", default=SENTIMENT_MODEL)
+    parser.add_argument("--revision", default=SENTIMENT_MODEL_REVISION)
+    parser.add_argument("--candidate", default="onnx", choices=BACKENDS)
+    args = parser.parse_args()
+
+    sample = pd.read_csv(args.csv)['Headline'].fillna("").head(args.limit).tolist()
+    report = parity_report(sample, args.model, args.revision, candidate=args.candidate)
+    print(json.dumps(report, indent=2))
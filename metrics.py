@@ -0,0 +1,310 @@
+import bisect
+import contextlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ============================================
+# METRICS PRIMITIVES
+# Fixed-bucket histograms (Prometheus style): cheap to update from any
+# thread and enough to estimate p50/p95/p99.
+# ============================================
+
+# Seconds: 0.5 ms .. 60 s
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with quantile estimates"""
+
+    def __init__(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[position] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside its bucket"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            observed_max = self._max
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else observed_max
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(estimate, observed_max)
+            seen += count
+        return observed_max
+
+    def snapshot(self):
+        with self._lock:
+            count, total, observed_max = self._count, self._sum, self._max
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "max": observed_max if count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter"""
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+# ============================================
+# STAGE SPANS
+# One histogram per named stage ("sentiment.inference", "prices.fetch",
+# "render.figures"...), plus an error counter. Wrap work in span():
+#
+#     with span("similarity.query"):
+#         ...
+# ============================================
+
+_stages = {}
+_stage_errors = {}
+_stages_lock = threading.Lock()
+
+
+def _stage(name):
+    histogram = _stages.get(name)
+    if histogram is None:
+        with _stages_lock:
+            histogram = _stages.get(name)
+            if histogram is None:
+                _stage_errors[name] = Counter(name, "Spans that raised")
+                histogram = _stages[name] = Histogram(name, "Stage latency in seconds")
+    return histogram
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time the enclosed block into the `name` stage histogram"""
+    histogram = _stage(name)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        _stage_errors[name].inc()
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start)
+
+
+def observe(name, seconds):
+    """Record a duration measured elsewhere (for code that can't be a with-block)"""
+    _stage(name).observe(seconds)
+
+
+# ============================================
+# COLLECTORS & EXPORT
+# Components with their own counters (scheduler, model registry, caches,
+# frame store) register a stats() callable; its numeric values are
+# exported as gauges next to the stage histograms. Components that keep
+# a Histogram register it to have it exported as one.
+# ============================================
+
+METRIC_PREFIX = "miniproj"
+
+_collectors = {}
+# Histograms owned by components (e.g. the batch scheduler), exported as
+# real Prometheus histograms rather than flattened into gauges
+_histograms = {}
+
+
+def register_collector(name, stats_fn):
+    """Export stats_fn() (a possibly nested dict) under `name`"""
+    _collectors[name] = stats_fn
+
+
+def register_histogram(histogram):
+    """Export `histogram` under its own name"""
+    _histograms[histogram.name] = histogram
+
+
+def stage_stats():
+    """{stage: latency snapshot + error count} for every stage seen so far"""
+    with _stages_lock:
+        stages = sorted(_stages.items())
+    return {
+        name: dict(histogram.snapshot(), errors=_stage_errors[name].value)
+        for name, histogram in stages
+    }
+
+
+def collect():
+    """Everything in one dict: stage latencies, histograms and every collector's stats"""
+    snapshot = {
+        "stages": stage_stats(),
+        "histograms": {name: h.snapshot() for name, h in sorted(_histograms.items())},
+    }
+    for name, stats_fn in list(_collectors.items()):
+        try:
+            snapshot[name] = stats_fn()
+        except Exception as e:
+            snapshot[name] = {"error": str(e)}
+    return snapshot
+
+
+def _metric_name(*parts):
+    name = "_".join(str(part) for part in parts if part != "")
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _flatten(prefix, value):
+    """Yield (name, number) for every numeric leaf of a nested dict"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(_metric_name(prefix, key), item)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+    elif isinstance(value, bool):
+        yield prefix, int(value)
+
+
+def _format(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def _histogram_lines(metric, histogram, labels=""):
+    """_bucket/_sum/_count lines for one histogram (labels: 'key="value"')"""
+    with histogram._lock:
+        counts = list(histogram._counts)
+        total, count = histogram._sum, histogram._count
+    prefix = f"{labels}," if labels else ""
+    suffix = f"{{{labels}}}" if labels else ""
+    lines = []
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets + (float("inf"),), counts):
+        cumulative += bucket_count
+        lines.append(f'{metric}_bucket{{{prefix}le="{_format(bound)}"}} {cumulative}')
+    lines.append(f"{metric}_sum{suffix} {_format(total)}")
+    lines.append(f"{metric}_count{suffix} {count}")
+    return lines
+
+
+def render_prometheus():
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    stage_metric = _metric_name(METRIC_PREFIX, "stage_seconds")
+    error_metric = _metric_name(METRIC_PREFIX, "stage_errors_total")
+    with _stages_lock:
+        stages = sorted(_stages.items())
+
+    lines.append(f"# HELP {stage_metric} Latency of each analysis stage")
+    lines.append(f"# TYPE {stage_metric} histogram")
+    for name, histogram in stages:
+        lines.extend(_histogram_lines(stage_metric, histogram, f'stage="{name}"'))
+
+    lines.append(f"# HELP {error_metric} Stage spans that raised")
+    lines.append(f"# TYPE {error_metric} counter")
+    for name, _ in stages:
+        lines.append(f'{error_metric}{{stage="{name}"}} {_stage_errors[name].value}')
+
+    for name, histogram in sorted(_histograms.items()):
+        metric = _metric_name(METRIC_PREFIX, name)
+        lines.append(f"# HELP {metric} {histogram.help}")
+        lines.append(f"# TYPE {metric} histogram")
+        lines.extend(_histogram_lines(metric, histogram))
+
+    for collector, stats in collect().items():
+        if collector in ("stages", "histograms"):
+            continue
+        for name, value in _flatten(_metric_name(METRIC_PREFIX, collector), stats):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# STANDALONE /metrics ENDPOINT
+# Metrics live per process. service.py serves them on its own /metrics
+# route; the Streamlit process starts this small server instead so its
+# render spans and caches can be scraped too.
+# ============================================
+
+METRICS_PORT = os.environ.get("MINIPROJ_METRICS_PORT")
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the app log
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    """
+    Serve render_prometheus() at http://host:port/metrics on a daemon
+    thread, once per process (safe to call on every Streamlit rerun).
+    Does nothing when no port is configured.
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint not started on port {port}: {e}")
+                _server = False
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            print(f"✅ Metrics at http://{host}:{port}/metrics")
+    return _server or None
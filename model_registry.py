@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+from inference_backends import load_pipeline, load_sentence_embedder, backend_tag
+from metrics import register_collector
+
+# ============================================
+# SHARED MODEL REGISTRY
+# One lazily-loaded instance per model for the whole process, used by
+# both the corpus path (utils) and the interactive path (analyzer).
+# ============================================
+
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+# Pinned to a commit (the one transformers itself pins for this model),
+# not a branch, so cached scores stay valid; override to upgrade the model
+SENTIMENT_MODEL_REVISION = os.environ.get("SENTIMENT_MODEL_REVISION", "714eb0f")
+# "torch" (reference) or "onnx" (int8 quantized ONNX Runtime, faster on CPU)
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "torch")
+
+# Sentence-embedding model for SIMILARITY_ENGINE=embedding
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Pinned to a commit for the same reason: stored embeddings are keyed by it
+EMBEDDING_MODEL_REVISION = os.environ.get("EMBEDDING_MODEL_REVISION", "c9745ed1d9f207416be6d2e6f8de32d1f16199bf")
+
+WARMUP_TEXTS = [
+    "Stocks rally as inflation cools",
+    "Company misses earnings estimates and cuts guidance",
+]
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def _rss_mb():
+    """Resident memory of this process in MB (None if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if os.uname().sysname == "Darwin" else peak / 1e3
+    except Exception:
+        return None
+
+
+class ModelSpec:
+    """What to load and how to run it"""
+
+    def __init__(self, model_name, revision="main", backend="torch",
+                 num_threads=None, batch_size=None, warmup=True, loader=load_pipeline):
+        self.model_name = model_name
+        self.revision = revision
+        self.backend = backend
+        self.num_threads = num_threads
+        self.batch_size = batch_size or 128
+        self.warmup = warmup
+        # loader(model_name, revision, backend, num_threads) -> callable model
+        self.loader = loader
+
+    @property
+    def version(self):
+        """Identifies the scores this model produces (used for cache keys)"""
+        return self.revision + backend_tag(self.backend)
+
+
+class ModelRegistry:
+    """Process-wide, thread-safe registry of lazily loaded models"""
+
+    def __init__(self):
+        self._specs = {}
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, key, spec):
+        with self._lock:
+            self._specs[key] = spec
+            self._locks.setdefault(key, threading.Lock())
+
+    def spec(self, key):
+        return self._specs[key]
+
+    def get(self, key):
+        """Return the model, loading (and warming) it on first use"""
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._locks[key]:
+            model = self._models.get(key)
+            if model is None:
+                model = self._load(key)
+                self._models[key] = model
+        return model
+
+    def _load(self, key):
+        spec = self._specs[key]
+        print(f"🔄 Loading model '{key}' ({spec.model_name}, {spec.backend})...")
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+
+        if spec.num_threads and spec.backend == "torch":
+            import torch
+            torch.set_num_threads(spec.num_threads)
+        model = spec.loader(spec.model_name, spec.revision, spec.backend, num_threads=spec.num_threads)
+        load_seconds = time.perf_counter() - start
+
+        warmup_seconds = None
+        if spec.warmup:
+            start = time.perf_counter()
+            model(WARMUP_TEXTS, truncation=True, max_length=512)
+            warmup_seconds = time.perf_counter() - start
+
+        rss_after = _rss_mb()
+        self._stats[key] = {
+            "model": spec.model_name,
+            "backend": spec.backend,
+            "load_seconds": round(load_seconds, 3),
+            "warmup_seconds": round(warmup_seconds, 3) if warmup_seconds is not None else None,
+            "rss_mb_after_load": round(rss_after, 1) if rss_after is not None else None,
+            "rss_mb_delta": round(rss_after - rss_before, 1) if None not in (rss_before, rss_after) else None,
+            "num_threads": spec.num_threads,
+            "batch_size": spec.batch_size,
+        }
+        print(f"✅ Model '{key}' loaded in {load_seconds:.1f}s")
+        return model
+
+    def is_loaded(self, key):
+        return key in self._models
+
+    def stats(self):
+        """Load time / memory per loaded model"""
+        return {key: dict(stats) for key, stats in self._stats.items()}
+
+
+registry = ModelRegistry()
+registry.register("sentiment", ModelSpec(
+    SENTIMENT_MODEL,
+    revision=SENTIMENT_MODEL_REVISION,
+    backend=SENTIMENT_BACKEND,
+    num_threads=_env_int("SENTIMENT_NUM_THREADS"),
+    batch_size=_env_int("SENTIMENT_BATCH_SIZE"),
+    warmup=os.environ.get("SENTIMENT_WARMUP", "1") != "0",
+))
+registry.register("embedding", ModelSpec(
+    EMBEDDING_MODEL,
+    revision=EMBEDDING_MODEL_REVISION,
+    num_threads=_env_int("EMBEDDING_NUM_THREADS"),
+    batch_size=_env_int("EMBEDDING_BATCH_SIZE") or 64,
+    warmup=os.environ.get("EMBEDDING_WARMUP", "1") != "0",
+    loader=load_sentence_embedder,
+))
+register_collector("models", registry.stats)
+
+
+def get_sentiment_model():
+    """The shared sentiment pipeline (loaded once per process)"""
+    return registry.get("sentiment")
+
+
+def get_embedding_model():
+    """The shared sentence embedder (loaded once per process)"""
+    return registry.get("embedding")
@@ -0,0 +1,151 @@
+import json
+import os
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from analyzer import load_news_data, describe_sentiment, find_matches, add_event_study
+from utils import get_stock_data_many, news_for_ticker
+from metrics import observe
+
+# ============================================
+# CONCURRENT ANALYSIS PIPELINE
+# Sentiment, similarity search and price retrieval are independent, so
+# they run side by side; total latency is the slowest stage rather than
+# the sum of all of them.
+# ============================================
+
+STAGE_LABELS = {
+    "sentiment": "Headline sentiment analyzed",
+    "similarity": "Historical headlines matched",
+    "prices": "Market data fetched",
+}
+
+
+def _similarity_stage(headline, window=None, ticker=None, event_ticker=None):
+    # The corpus load is cached; only the very first run pays for it
+    matched = find_matches(load_news_data(), headline, window=window, ticker=ticker)
+    # Realized moves after each match need the matches, so they run here
+    return add_event_study(matched, event_ticker)
+
+
+def run_analysis(headline, ticker, period, comparison_ticker="",
+                 on_stage=None, initializer=None, window=None, match_ticker=False):
+    """
+    Run every analysis stage concurrently.
+    window limits historical matches in time ("30d", "1y", "2024Q3"...);
+    match_ticker limits them to headlines about `ticker`.
+
+    on_stage(name, done, total, seconds) is called from the calling thread
+    as each stage finishes, so it can safely update the UI. `initializer`
+    runs in each worker thread first (e.g. to attach a Streamlit context).
+    """
+    tickers = [ticker, comparison_ticker] if comparison_ticker else [ticker]
+    stages = {
+        "sentiment": (describe_sentiment, headline),
+        "similarity": (_similarity_stage, headline, window, ticker if match_ticker else None, ticker),
+        "prices": (get_stock_data_many, tickers, period),
+    }
+
+    results = {}
+    timings = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(stages), initializer=initializer,
+                            thread_name_prefix="analysis") as pool:
+        futures = {
+            pool.submit(fn, *args): name
+            for name, (fn, *args) in stages.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            results[name] = future.result()
+            timings[name] = time.perf_counter() - start
+            if on_stage is not None:
+                on_stage(name, done, len(stages), timings[name])
+    observe("analysis.pipeline", time.perf_counter() - start)
+
+    polarity, impact = results["sentiment"]
+    matched, events = results["similarity"]
+    prices = results["prices"]
+    stock_df = prices.get(ticker, (None, None))[0]
+    comparison_df = prices.get(comparison_ticker, (None, None))[0] if comparison_ticker else None
+
+    return {
+        "result": {
+            'polarity': polarity,
+            'impact': impact,
+            'matched': matched,
+            'event_study': events
+        },
+        "stock_df": stock_df,
+        "comparison_df": comparison_df,
+        "timings": timings,
+    }
+
+
+# ============================================
+# REMOTE ANALYSIS (service.py)
+# When ANALYSIS_SERVICE_URL is set the UI becomes a thin client: the
+# service batches inference across every caller.
+# ============================================
+
+ANALYSIS_SERVICE_URL = os.environ.get("ANALYSIS_SERVICE_URL", "").rstrip("/")
+
+
+def _records_frame(records):
+    if records is None:
+        return None
+    df = pd.DataFrame(records)
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], utc=True, errors='coerce')
+    return df
+
+
+def run_remote_analysis(headline, ticker, period, comparison_ticker="", window=None,
+                        match_ticker=False, url=ANALYSIS_SERVICE_URL, timeout=60):
+    """Same return shape as run_analysis, computed by the HTTP service"""
+    payload = json.dumps({
+        "headline": headline,
+        "ticker": ticker,
+        "period": period,
+        "comparison_ticker": comparison_ticker,
+        "include_prices": True,
+        "window": window,
+        "match_ticker": match_ticker,
+    }).encode("utf-8")
+    request = urllib.request.Request(
+        f"{url}/analyze", data=payload, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = json.load(response)
+
+    prices = body.get("prices") or {}
+    matched = _records_frame(body["matched"])
+    if matched is not None and 'Date' in matched.columns:
+        matched['Date'] = matched['Date'].dt.tz_localize(None)
+    return {
+        "result": {
+            'polarity': body["polarity"],
+            'impact': body["impact"],
+            'matched': matched,
+            'event_study': body.get("event_study")
+        },
+        "stock_df": _records_frame(prices.get(ticker)),
+        "comparison_df": _records_frame(prices.get(comparison_ticker)) if comparison_ticker else None,
+        "timings": {"remote": body.get("elapsed_ms", 0) / 1000},
+    }
+
+
+def ticker_news(ticker, window=None, limit=5, url=ANALYSIS_SERVICE_URL, timeout=30):
+    """Latest corpus headlines about a ticker (from the service when configured)"""
+    if not url:
+        return news_for_ticker(load_news_data(), ticker, window, limit)
+    query = urllib.parse.urlencode({"ticker": ticker, "window": window or "", "limit": limit})
+    with urllib.request.urlopen(f"{url}/news?{query}", timeout=timeout) as response:
+        news = _records_frame(json.load(response)["rows"])
+    if news is not None and 'Date' in news.columns:
+        news['Date'] = news['Date'].dt.tz_localize(None)
+    return news
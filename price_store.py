@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+
+from cache import cache_path
+
+# ============================================
+# LOCAL INCREMENTAL OHLCV STORE
+# One Parquet file per ticker holding the longest history fetched so far.
+# Any `period` is served as a slice; only bars newer than the last stored
+# date are requested from the provider (plus a full refetch the first time
+# a longer period is asked for).
+# ============================================
+
+# Re-check the provider for new bars at most this often per ticker
+REFRESH_SECONDS = int(os.environ.get("PRICE_REFRESH_SECONDS", 15 * 60))
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# Short periods mean trading sessions, not calendar days: "5d" on a
+# Monday is last week's five sessions. They are served as the last N bars.
+PERIOD_BARS = {"1d": 1, "5d": 5}
+
+
+# Concurrent fetches are capped so we stay polite to the upstream API
+MAX_FETCH_WORKERS = int(os.environ.get("PRICE_FETCH_WORKERS", 8))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _shared_session():
+    """One HTTP session for every yfinance call so connections are reused"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            try:
+                # Recent yfinance versions require a curl_cffi session
+                from curl_cffi import requests as cffi_requests
+                _session = cffi_requests.Session(impersonate="chrome")
+            except ImportError:
+                _session = False  # let yfinance manage its own shared session
+    return _session or None
+
+
+def yfinance_history(ticker, **kwargs):
+    """Default provider: yfinance history with a Date index"""
+    return yf.Ticker(ticker, session=_shared_session()).history(**kwargs)
+
+
+def period_start(period, now=None):
+    """First date covered by a period ('max' -> None)"""
+    now = pd.Timestamp(now or pd.Timestamp.now()).normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+    return now - PERIOD_OFFSETS[period]
+
+
+class PriceStore:
+    """Per-ticker Parquet history with incremental tail updates"""
+
+    def __init__(self, root=None, fetch=yfinance_history, refresh_seconds=REFRESH_SECONDS):
+        self.root = root or os.path.dirname(cache_path("prices", "_"))
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self._frames = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _ticker_lock(self, ticker):
+        with self._lock:
+            return self._locks.setdefault(ticker, threading.Lock())
+
+    def _paths(self, ticker):
+        safe = ticker.replace("/", "_").replace("^", "_idx_")
+        return (os.path.join(self.root, f"{safe}.parquet"),
+                os.path.join(self.root, f"{safe}.json"))
+
+    def _read(self, ticker):
+        if ticker in self._frames:
+            return self._frames[ticker]
+        data_path, meta_path = self._paths(ticker)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        df = pd.read_parquet(data_path)
+        self._frames[ticker] = (df, meta)
+        return df, meta
+
+    def _write(self, ticker, df, meta):
+        data_path, meta_path = self._paths(ticker)
+        # Atomic replace so readers in other processes never see half a file
+        tmp = f"{data_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, data_path)
+        tmp = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+        self._frames[ticker] = (df, meta)
+
+    def _download(self, ticker, **kwargs):
+        df = self.fetch(ticker, **kwargs)
+        if df is None or df.empty:
+            return None
+        return df.reset_index()
+
+    def history(self, ticker, period="1y"):
+        """Return OHLCV rows for `period` with 'Date' as a column"""
+        if period not in PERIOD_OFFSETS and period not in ("max", "ytd"):
+            # Unknown period string: pass straight through to the provider
+            return self._download(ticker, period=period)
+
+        start = period_start(period)
+        with self._ticker_lock(ticker):
+            df, meta = self._read(ticker)
+            covered = meta is not None and (
+                meta["covered_from"] is None
+                or (start is not None and pd.Timestamp(meta["covered_from"]) <= start)
+            )
+
+            if not covered:
+                try:
+                    fetched = self._download(ticker, period=period)
+                except Exception as e:
+                    if df is None:
+                        raise
+                    # Serve the stored bars; meta is untouched so the next call retries
+                    print(f"⚠️ Price fetch for {ticker} ({period}) failed, serving stored history: {e}")
+                    fetched = None
+                if fetched is None:
+                    # Provider failed or has nothing: serve what we already have
+                    return self._slice(df, start, PERIOD_BARS.get(period))
+                df = self._merge(df, fetched)
+                covered_from = None if start is None else str(start.date())
+                if meta is not None and meta["covered_from"] is not None and covered_from is not None:
+                    covered_from = min(covered_from, meta["covered_from"])
+                meta = {"covered_from": covered_from, "fetched_at": time.time()}
+                self._write(ticker, df, meta)
+            elif time.time() - meta["fetched_at"] > self.refresh_seconds:
+                # Only ask for bars since the last stored date (re-fetch it:
+                # today's bar may have been partial)
+                last_date = df['Date'].iloc[-1]
+                try:
+                    tail = self._download(ticker, start=pd.Timestamp(last_date).strftime("%Y-%m-%d"))
+                except Exception as e:
+                    # fetched_at stays old so the next call tries again
+                    print(f"⚠️ Price refresh for {ticker} failed, serving stored history: {e}")
+                    return self._slice(df, start, PERIOD_BARS.get(period))
+                if tail is not None:
+                    df = self._merge(df, tail)
+                meta = dict(meta, fetched_at=time.time())
+                self._write(ticker, df, meta)
+
+        return self._slice(df, start, PERIOD_BARS.get(period))
+
+    def history_many(self, tickers, period="1y", max_workers=MAX_FETCH_WORKERS):
+        """
+        Fetch several tickers concurrently through a bounded thread pool.
+        Returns {ticker: (DataFrame or None, error message or None)}.
+        """
+        tickers = list(dict.fromkeys(t for t in tickers if t))
+        if not tickers:
+            return {}
+
+        def fetch_one(ticker):
+            try:
+                df = self.history(ticker, period)
+                if df is None or df.empty:
+                    return None, f"No data returned for {ticker}"
+                return df, None
+            except Exception as e:
+                return None, str(e)
+
+        workers = max(1, min(max_workers, len(tickers)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="price-fetch") as pool:
+            results = pool.map(fetch_one, tickers)
+            return dict(zip(tickers, results))
+
+    @staticmethod
+    def _merge(old, new):
+        if old is None or old.empty:
+            return new.sort_values('Date').reset_index(drop=True)
+        combined = pd.concat([old, new], ignore_index=True)
+        combined = combined.drop_duplicates(subset='Date', keep='last')
+        return combined.sort_values('Date').reset_index(drop=True)
+
+    @staticmethod
+    def _slice(df, start, bars=None):
+        if df is not None and bars is not None:
+            return df.tail(bars).reset_index(drop=True)
+        if df is None or start is None:
+            return df.copy() if df is not None else None
+        dates = df['Date']
+        if getattr(dates.dt, "tz", None) is not None:
+            start = start.tz_localize(dates.dt.tz)
+        # Dates are sorted, so a binary search finds the slice start
+        first = dates.searchsorted(start)
+        return df.iloc[first:].reset_index(drop=True)
+
+
+price_store = PriceStore()
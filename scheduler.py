@@ -0,0 +1,106 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import Histogram, SIZE_BUCKETS, register_histogram
+
+# ============================================
+# CROSS-SESSION MICRO-BATCHING SCHEDULER
+# Every Streamlit session runs its script on its own thread. Instead of
+# each one calling the model with a batch of 1, pending headlines from
+# all sessions are collected for a few milliseconds and scored as one
+# batch; each caller gets its own result back.
+# ============================================
+
+BATCH_WINDOW_MS = float(os.environ.get("SENTIMENT_BATCH_WINDOW_MS", 5))
+MAX_BATCH_SIZE = int(os.environ.get("SENTIMENT_MAX_BATCH_SIZE", 32))
+
+
+class MicroBatchScheduler:
+    """
+    Collects submit() calls from any thread and runs `batch_fn(items)`
+    on a single worker thread. batch_fn must return one result per item.
+    If it raises, the batch is split and retried so that only the items
+    that fail on their own get the exception.
+    """
+
+    def __init__(self, batch_fn, window_ms=BATCH_WINDOW_MS, max_batch_size=MAX_BATCH_SIZE, name="batch"):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue_wait = Histogram(f"{name}_queue_wait_seconds", "Time a request waited for its batch to start")
+        self.batch_size = Histogram(f"{name}_batch_size", "Items per executed batch", buckets=SIZE_BUCKETS)
+        register_histogram(self.queue_wait)
+        register_histogram(self.batch_size)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.name = name
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=f"{self.name}-scheduler", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item):
+        """Queue one item; returns a concurrent.futures.Future"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit and wait for the result"""
+        return self.submit(item).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                self.queue_wait.observe(started - queued_at)
+            self.batch_size.observe(len(batch))
+
+            self._execute([(item, future) for item, future, _ in batch])
+
+    def _execute(self, batch):
+        """Run one batch; on failure split it so only the bad item(s) fail"""
+        try:
+            results = self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            results = None
+        if results is None:
+            # Retried outside the except block so errors don't chain
+            mid = len(batch) // 2
+            self._execute(batch[:mid])
+            self._execute(batch[mid:])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "pending": self._queue.qsize(),
+        }
@@ -0,0 +1,71 @@
+import hashlib
+import sqlite3
+import threading
+
+from cache import cache_path
+
+# ============================================
+# PERSISTENT SENTIMENT SCORES
+# Scores are keyed by a hash of the normalized headline plus the model
+# name and revision, so a restart (or a new replica sharing the cache
+# folder) only runs the model on headlines it has never seen.
+# ============================================
+
+# SQLite limits the number of "?" placeholders per statement
+_LOOKUP_CHUNK = 500
+
+
+def normalize_headline(headline):
+    """Collapse whitespace and lowercase (the model is uncased anyway)"""
+    return " ".join(str(headline).split()).lower()
+
+
+class SentimentStore:
+    """Content-addressed sentiment cache backed by a single SQLite file"""
+
+    def __init__(self, model_name, revision, path=None):
+        self.model_key = f"{model_name}@{revision}"
+        self.path = path or cache_path("sentiment.sqlite3")
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment (key TEXT PRIMARY KEY, score REAL NOT NULL)"
+            )
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def key(self, headline):
+        """Stable key for a headline under the current model"""
+        payload = f"{self.model_key}\x00{normalize_headline(headline)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: score} for every key already in the store"""
+        keys = list(keys)
+        found = {}
+        conn = self._conn()
+        for i in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[i:i + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, score FROM sentiment WHERE key IN ({placeholders})", chunk
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, scores):
+        """Persist {key: score} pairs"""
+        if not scores:
+            return
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment (key, score) VALUES (?, ?)",
+                list(scores.items())
+            )
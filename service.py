@@ -0,0 +1,223 @@
+"""
+Async HTTP analysis service.
+
+    python service.py --port 8080
+
+Endpoints (JSON):
+    GET  /health
+    POST /analyze    {"headline": ..., "ticker": "TSLA", "period": "1y",
+                      "comparison_ticker": "SPY", "include_prices": false,
+                      "engine": "tfidf" | "embedding", "window": "90d" | "2024Q3",
+                      "match_ticker": false}
+    POST /sentiment  {"headlines": [...]}
+    GET  /stock?ticker=TSLA&period=1y
+    GET  /news?ticker=TSLA&window=90d&limit=20
+    GET  /metrics    Prometheus text format (stage latencies, caches, batching)
+
+Concurrent requests are coalesced into shared transformer batches; all
+blocking work (inference, corpus search, price fetches) runs in executors
+so the event loop stays responsive.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from analyzer import sentiment_scheduler, describe_score, find_matches, add_event_study, load_news_data
+from utils import get_stock_data_many, resolve_window, news_for_ticker
+from metrics import span, render_prometheus
+from similarity_index import ENGINES
+
+# ============================================
+# REQUEST MICRO-BATCHING
+# Concurrent requests share the process-wide sentiment scheduler (see
+# scheduler.py) with any other caller, so there is one batching path
+# and one set of queue-wait / batch-size histograms.
+# ============================================
+
+def _score(headline):
+    """Awaitable (label, score) from the shared micro-batch scheduler"""
+    return asyncio.wrap_future(sentiment_scheduler.submit(headline))
+
+
+# ============================================
+# HANDLERS
+# ============================================
+
+def _frame_records(df):
+    """DataFrame -> JSON-friendly list of dicts (dates as ISO strings, NaN as null)"""
+    if df is None:
+        return None
+    out = df.copy()
+    if 'Date' in out.columns:
+        out['Date'] = out['Date'].astype(str)
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict(orient="records")
+
+
+async def _json_body(request):
+    """The request body as a JSON object, or 400 Bad Request"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(reason="Request body must be valid JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(reason="Request body must be a JSON object")
+    return body
+
+
+def _string_field(body, name, default=""):
+    """body[name] as a string (default when missing, null or empty), or 400 Bad Request"""
+    value = body.get(name)
+    if value is not None and not isinstance(value, str):
+        raise web.HTTPBadRequest(reason=f"'{name}' must be a string")
+    return value or default
+
+
+async def _in_executor(request, fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app["executor"], fn, *args)
+
+
+@web.middleware
+async def timing_middleware(request, handler):
+    """Every request is a span named after its route (service./analyze...)"""
+    route = request.match_info.route.resource
+    name = route.canonical if route is not None else "unmatched"
+    with span(f"service.{name}"):
+        return await handler(request)
+
+
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def metrics(request):
+    text = await _in_executor(request, render_prometheus)
+    return web.Response(text=text, headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def sentiment(request):
+    body = await _json_body(request)
+    headlines = body.get("headlines") or []
+    if not isinstance(headlines, list) or not all(isinstance(h, str) for h in headlines):
+        raise web.HTTPBadRequest(reason="'headlines' must be a list of strings")
+    results = await asyncio.gather(*(_score(h) for h in headlines))
+    return web.json_response([
+        dict(zip(("polarity", "impact"), describe_score(label, score)), label=label, score=score)
+        for label, score in results
+    ])
+
+
+async def analyze(request):
+    body = await _json_body(request)
+    headline = _string_field(body, "headline").strip()
+    if not headline:
+        raise web.HTTPBadRequest(reason="'headline' is required")
+    ticker = _string_field(body, "ticker").upper()
+    period = _string_field(body, "period", "1y")
+    comparison_ticker = _string_field(body, "comparison_ticker").upper()
+    engine = body.get("engine")
+    if engine is not None and engine not in ENGINES:
+        raise web.HTTPBadRequest(reason=f"'engine' must be one of {list(ENGINES)}")
+    window = body.get("window")
+    try:
+        resolve_window(window)
+    except (ValueError, TypeError) as e:
+        raise web.HTTPBadRequest(reason=str(e))
+
+    start = time.perf_counter()
+    stages = [
+        _score(headline),
+        _in_executor(request, lambda: add_event_study(find_matches(
+            load_news_data(), headline, engine=engine, window=window,
+            ticker=ticker if body.get("match_ticker") else None), ticker)),
+    ]
+    if ticker:
+        tickers = [ticker, comparison_ticker] if comparison_ticker else [ticker]
+        stages.append(_in_executor(request, get_stock_data_many, tickers, period))
+    results = await asyncio.gather(*stages)
+
+    (label, score), (matched, events) = results[0], results[1]
+    polarity, impact = describe_score(label, score)
+    response = {
+        "polarity": polarity,
+        "impact": impact,
+        "matched": _frame_records(matched),
+        "event_study": events,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    if ticker:
+        prices = results[2]
+        response["errors"] = {t: err for t, (_, err) in prices.items() if err}
+        if body.get("include_prices"):
+            response["prices"] = {t: _frame_records(df) for t, (df, _) in prices.items()}
+    return web.json_response(response)
+
+
+async def stock(request):
+    ticker = request.query.get("ticker", "").upper()
+    if not ticker:
+        raise web.HTTPBadRequest(reason="'ticker' is required")
+    period = request.query.get("period", "1y")
+    (df, error), = (await _in_executor(request, get_stock_data_many, [ticker], period)).values()
+    if df is None:
+        raise web.HTTPNotFound(reason=error or f"No data for {ticker}")
+    return web.json_response({"ticker": ticker, "period": period, "rows": _frame_records(df)})
+
+
+async def news(request):
+    ticker = request.query.get("ticker", "").upper()
+    if not ticker:
+        raise web.HTTPBadRequest(reason="'ticker' is required")
+    window = request.query.get("window") or None
+    try:
+        resolve_window(window)
+        limit = int(request.query.get("limit", 20))
+    except ValueError as e:
+        raise web.HTTPBadRequest(reason=str(e))
+    rows = await _in_executor(request, lambda: news_for_ticker(load_news_data(), ticker, window, limit))
+    return web.json_response({"ticker": ticker, "rows": _frame_records(rows)})
+
+
+# ============================================
+# APP
+# ============================================
+
+def create_app(workers=None):
+    app = web.Application(middlewares=[timing_middleware])
+    app["executor"] = ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4),
+                                         thread_name_prefix="service")
+
+    async def on_startup(app):
+        # Load the corpus before the first request arrives
+        await asyncio.get_running_loop().run_in_executor(app["executor"], load_news_data)
+
+    async def on_cleanup(app):
+        app["executor"].shutdown(wait=False)
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_get("/health", health)
+    app.router.add_post("/analyze", analyze)
+    app.router.add_post("/sentiment", sentiment)
+    app.router.add_get("/stock", stock)
+    app.router.add_get("/news", news)
+    app.router.add_get("/metrics", metrics)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the analysis HTTP service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="Executor threads for blocking work")
+    args = parser.parse_args(argv)
+    web.run_app(create_app(args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
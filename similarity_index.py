@@ -0,0 +1,252 @@
+import hashlib
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from cache import cache_path, prune_versions
+
+# ============================================
+# TF-IDF SIMILARITY INDEX (Fitted once per corpus)
+# The vectorizer is fitted on the corpus only, then pickled next to the
+# other caches. A query just transforms one headline and runs one sparse
+# dot product against the stored matrix.
+#
+# SIMILARITY_ENGINE=embedding switches to dense sentence embeddings
+# (embedding_index.py), which also match paraphrases. Both engines share
+# the interface below (top_k, top_k_many, extend).
+# ============================================
+
+ENGINES = ("tfidf", "embedding")
+SIMILARITY_ENGINE = os.environ.get("SIMILARITY_ENGINE", "tfidf")
+
+# Keep only a couple of corpus versions per engine in memory (old +
+# freshly rebuilt), and on disk
+_MAX_IN_MEMORY = 2
+
+_indexes = {}
+_lock = threading.Lock()
+# One lock per (engine, version) being fitted, so a slow fit only blocks
+# callers waiting for that same index
+_fit_locks = {}
+
+
+def corpus_version(news_df):
+    """Fingerprint the headlines; remembered in df.attrs so it is computed once"""
+    version = news_df.attrs.get("corpus_version")
+    # pandas copies attrs onto slices and reordered copies, so the memo is
+    # only trusted on the frame that computed it
+    if version is None or news_df.attrs.get("corpus_owner") != id(news_df):
+        hashes = pd.util.hash_pandas_object(news_df['Headline'].fillna(""), index=False).values
+        version = hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+        news_df.attrs["corpus_version"] = version
+        news_df.attrs["corpus_owner"] = id(news_df)
+    return version
+
+
+class SimilarityIndex:
+    """Fitted TF-IDF vectorizer plus the L2-normalized corpus matrix"""
+
+    engine = "tfidf"
+    # IDF weights drift as the corpus grows, so refit after enough appends
+    refit_on_growth = True
+
+    def __init__(self, vectorizer, matrix):
+        self.vectorizer = vectorizer
+        self.matrix = matrix.tocsr()
+
+    @classmethod
+    def fit(cls, headlines):
+        vectorizer = TfidfVectorizer(
+            max_features=5000,      # Limit features for speed
+            stop_words='english',    # Remove common words
+            ngram_range=(1, 2),      # Unigrams and bigrams
+            min_df=2                 # Ignore rare terms
+        )
+        matrix = vectorizer.fit_transform(headlines)
+        return cls(vectorizer, matrix)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def extend(self, headlines):
+        """
+        New index with extra rows appended, reusing the fitted vocabulary
+        and IDF weights (no refit). The original index is left untouched,
+        so readers holding it keep a consistent view.
+        """
+        new_rows = self.vectorizer.transform(headlines)
+        return SimilarityIndex(self.vectorizer, sp.vstack([self.matrix, new_rows], format="csr"))
+
+    def take(self, order):
+        """New index with rows reordered to match a re-sorted corpus"""
+        return SimilarityIndex(self.vectorizer, self.matrix[order])
+
+    def scores(self, headline, rows=None):
+        """
+        Cosine similarity of the headline against every corpus row, or only
+        against `rows` (a slice or an array of row positions).
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        # Rows are already L2-normalized, so cosine similarity is a dot product
+        query_vector = self.vectorizer.transform([headline])
+        return (matrix @ query_vector.T).toarray().ravel()
+
+    def top_k(self, headline, k=10, rows=None):
+        """Row positions and scores of the k best matches, best first"""
+        return top_k_in_rows(self.scores(headline, rows), k, rows)
+
+    def top_k_many(self, headlines, k=10, block_size=256):
+        """
+        Top-k matches for many headlines at once, as (positions, scores)
+        arrays of shape (len(headlines), k). Queries are scored in blocks
+        so the dense score matrix stays block_size x corpus.
+        """
+        k = min(k, len(self))
+        n = len(headlines)
+        positions = np.empty((n, k), dtype=np.intp)
+        scores = np.empty((n, k), dtype=np.float64)
+        if n == 0 or k == 0:
+            return positions, scores
+        matrix_t = self.matrix.T.tocsr()
+        for start in range(0, n, block_size):
+            queries = self.vectorizer.transform(headlines[start:start + block_size])
+            block = (queries @ matrix_t).toarray()
+            top, top_scores = top_k_rows(block, k)
+            positions[start:start + len(block)] = top
+            scores[start:start + len(block)] = top_scores
+        return positions, scores
+
+
+def _first_of_ties(scores, positions):
+    """
+    argpartition picks arbitrarily among rows tied at the k-th score;
+    swap those for the earliest tied rows so results match nlargest
+    """
+    kth = scores[positions].min()
+    above = positions[scores[positions] > kth]
+    tied = np.flatnonzero(scores == kth)[:len(positions) - len(above)]
+    return np.concatenate([above, tied])
+
+
+def top_k_positions(scores, k):
+    """
+    Pick the k highest scores without sorting the whole vector.
+    argpartition is O(n); only the k winners get sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=scores.dtype)
+    if k < len(scores):
+        positions = _first_of_ties(scores, np.argpartition(-scores, k - 1)[:k])
+    else:
+        positions = np.arange(len(scores))
+    # Highest score first; ties keep corpus order like DataFrame.nlargest
+    order = np.lexsort((positions, -scores[positions]))
+    positions = positions[order]
+    return positions, scores[positions]
+
+
+def top_k_in_rows(scores, k, rows=None):
+    """top_k_positions over scores for a subset of rows, as corpus positions"""
+    positions, top_scores = top_k_positions(scores, k)
+    if rows is None:
+        return positions, top_scores
+    if isinstance(rows, slice):
+        return positions + (rows.start or 0), top_scores
+    return np.asarray(rows)[positions], top_scores
+
+
+def top_k_rows(block, k):
+    """Row-wise top_k_positions for a (queries x corpus) score matrix"""
+    if k < block.shape[1]:
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        selected = np.take_along_axis(block, top, axis=1)
+        kth = selected.min(axis=1, keepdims=True)
+        # Only rows whose k-th score is tied with a row left out need fixing
+        straddling = (block == kth).sum(axis=1) > (selected == kth).sum(axis=1)
+        for row in np.flatnonzero(straddling):
+            top[row] = _first_of_ties(block[row], top[row])
+    else:
+        top = np.tile(np.arange(block.shape[1]), (block.shape[0], 1))
+    top_scores = np.take_along_axis(block, top, axis=1)
+    # Highest score first; ties keep corpus order
+    order = np.lexsort((top, -top_scores), axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def _load_or_fit(version, headlines, engine="tfidf"):
+    if engine == "embedding":
+        # Imported lazily: sentence-transformers is only needed for this engine
+        from embedding_index import load_or_embed
+        return load_or_embed(version, headlines)
+    if engine != "tfidf":
+        raise ValueError(f"Unknown similarity engine '{engine}'. Choose one of {ENGINES}")
+
+    path = cache_path("similarity", f"tfidf-{version}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    print(f"🔄 Fitting TF-IDF index for {len(headlines)} headlines...")
+    index = SimilarityIndex.fit(headlines)
+
+    # Write atomically so concurrent replicas never read a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    prune_versions(cache_path("similarity", "tfidf-*.pkl"), keep=_MAX_IN_MEMORY)
+    return index
+
+
+def _remember(key, index):
+    # Caller holds _lock
+    _indexes[key] = index
+    while len(_indexes) > _MAX_IN_MEMORY * len(ENGINES):
+        _indexes.pop(next(iter(_indexes)))
+
+
+def register_index(news_df, index):
+    """Make `index` the similarity index for this exact corpus frame"""
+    key = (index.engine, corpus_version(news_df))
+    with _lock:
+        _remember(key, index)
+
+
+def registered_indexes(news_df):
+    """{engine: index} for every engine already built for this corpus (nothing is fitted)"""
+    version = corpus_version(news_df)
+    with _lock:
+        return {engine: index for (engine, v), index in _indexes.items() if v == version}
+
+
+def get_similarity_index(news_df, engine=None):
+    """
+    Return the similarity index for this corpus, fitting it only on first use.
+    engine is "tfidf" or "embedding" (default: SIMILARITY_ENGINE).
+    """
+    engine = engine or SIMILARITY_ENGINE
+    version = corpus_version(news_df)
+    key = (engine, version)
+    # Cache hits never wait on a fit in progress
+    index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    with _lock:
+        fit_lock = _fit_locks.setdefault(key, threading.Lock())
+    with fit_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _load_or_fit(version, news_df['Headline'].fillna("").tolist(), engine)
+            with _lock:
+                _remember(key, index)
+    with _lock:
+        if _fit_locks.get(key) is fit_lock:
+            del _fit_locks[key]
+    return index
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import compute_indicators
+
+
+def make_prices(bars=300, gaps=(40, 41, 150), seed=0):
+    """Random-walk OHLCV with missing closes (and a missing volume) at `gaps`"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    df = pd.DataFrame({
+        'Date': pd.bdate_range("2023-01-02", periods=bars),
+        'Close': close,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Volume': rng.integers(1_000, 5_000, bars).astype(float),
+    })
+    df.loc[list(gaps), ['Close', 'High', 'Low']] = np.nan
+    if gaps:
+        df.loc[gaps[-1], 'Volume'] = np.nan
+    return df
+
+
+def pandas_reference(df):
+    close = df['Close']
+    returns = close.pct_change()
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    ma20 = close.rolling(window=20).mean()
+    std20 = close.rolling(window=20).std()
+    return pd.DataFrame({
+        'MA20': ma20,
+        'MA50': close.rolling(window=50).mean(),
+        'Upper_Band': ma20 + 2 * std20,
+        'Lower_Band': ma20 - 2 * std20,
+        'Returns': returns,
+        'Cumulative_Returns': (1 + returns).cumprod() - 1,
+        'RSI': 100 - (100 / (1 + gain / loss)),
+    })
+
+
+@pytest.mark.parametrize("gaps", [(), (0,), (40, 41, 150), (299,)])
+def test_series_match_pandas_rolling_with_gaps(gaps):
+    df = make_prices(gaps=gaps)
+    series = compute_indicators(df)['series']
+    expected = pandas_reference(df)
+    for column in expected.columns:
+        np.testing.assert_allclose(series[column], expected[column], rtol=1e-7, atol=1e-9,
+                                   equal_nan=True, err_msg=column)
+
+
+def test_one_gap_only_blanks_the_windows_containing_it():
+    series = compute_indicators(make_prices(gaps=(100,)))['series']
+    ma20 = series['MA20'].to_numpy()
+    assert np.isnan(ma20[100:120]).all()
+    assert np.isfinite(ma20[120:]).all()
+
+
+def test_summary_values_skip_missing_bars():
+    df = make_prices()
+    result = compute_indicators(df)
+    close = df['Close']
+    assert result['high'] == pytest.approx(df['High'].max())
+    assert result['low'] == pytest.approx(df['Low'].min())
+    assert result['avg_volume'] == pytest.approx(df['Volume'].mean())
+    assert result['max_drawdown_pct'] == pytest.approx(((close / close.cummax()) - 1).min() * 100)
+    returns = close.pct_change().dropna()
+    assert result['daily_volatility'] == pytest.approx(returns.std())
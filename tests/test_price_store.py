@@ -0,0 +1,123 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore
+
+
+def make_history(bars=30):
+    dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=bars)
+    return pd.DataFrame({"Close": np.arange(bars, dtype=float)}, index=pd.Index(dates, name="Date"))
+
+
+class FakeProvider:
+    """Records calls and how many ran at once; fails for tickers in `errors`"""
+
+    def __init__(self, delay=0.0, errors=(), empty=()):
+        self.delay = delay
+        self.errors = set(errors)
+        self.empty = set(empty)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, ticker, **kwargs):
+        with self._lock:
+            self.calls.append(ticker)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if ticker in self.errors:
+                raise ConnectionError(f"upstream refused {ticker}")
+            if ticker in self.empty:
+                return pd.DataFrame()
+            return make_history()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_history_many_caps_concurrent_fetches(tmp_path):
+    fake = FakeProvider(delay=0.05)
+    store = PriceStore(root=str(tmp_path), fetch=fake)
+    tickers = [f"T{i}" for i in range(10)]
+
+    results = store.history_many(tickers, period="1mo", max_workers=3)
+
+    assert list(results) == tickers
+    assert 1 < fake.peak <= 3
+    assert all(err is None and len(df) > 0 for df, err in results.values())
+
+
+def test_history_many_captures_errors_per_ticker(tmp_path):
+    fake = FakeProvider(errors={"BAD"}, empty={"NONE"})
+    store = PriceStore(root=str(tmp_path), fetch=fake)
+
+    results = store.history_many(["GOOD", "BAD", "NONE"], period="1mo")
+
+    df, err = results["GOOD"]
+    assert err is None and not df.empty
+    assert results["BAD"] == (None, "upstream refused BAD")
+    assert results["NONE"] == (None, "No data returned for NONE")
+
+
+def test_history_many_deduplicates_tickers(tmp_path):
+    fake = FakeProvider()
+    store = PriceStore(root=str(tmp_path), fetch=fake)
+
+    results = store.history_many(["AAA", "BBB", "AAA", "", None, "BBB"], period="1mo")
+
+    assert list(results) == ["AAA", "BBB"]
+    assert sorted(fake.calls) == ["AAA", "BBB"]
+
+
+class FlakyProvider:
+    """Serves history until `failing` is set, then raises"""
+
+    def __init__(self):
+        self.failing = False
+        self.calls = 0
+
+    def __call__(self, ticker, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("provider down")
+        return make_history(300)
+
+
+def test_failed_tail_refresh_serves_stored_history(tmp_path):
+    fake = FlakyProvider()
+    store = PriceStore(root=str(tmp_path), fetch=fake, refresh_seconds=0)
+    stored = store.history("AAA", "1y")
+    fake.failing = True
+
+    served = store.history("AAA", "1y")
+
+    pd.testing.assert_frame_equal(served, stored)
+    # fetched_at was not bumped, so the next call tries the provider again
+    store.history("AAA", "1y")
+    assert fake.calls == 3
+
+
+def test_failed_longer_fetch_serves_stored_history(tmp_path):
+    fake = FlakyProvider()
+    store = PriceStore(root=str(tmp_path), fetch=fake)
+    stored = store.history("AAA", "1mo")
+    fake.failing = True
+
+    served = store.history("AAA", "5y")
+
+    assert len(served) == 300
+    pd.testing.assert_frame_equal(store.history("AAA", "1mo"), stored)
+
+
+def test_failed_first_fetch_reports_the_error(tmp_path):
+    fake = FlakyProvider()
+    fake.failing = True
+    store = PriceStore(root=str(tmp_path), fetch=fake)
+
+    assert store.history_many(["AAA"], period="1y") == {"AAA": (None, "provider down")}
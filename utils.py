@@ -1,101 +1,310 @@
+import functools
+import re
+import numpy as np
 import pandas as pd
-import streamlit as st
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from transformers import pipeline
-import yfinance as yf
+from sentiment_store import SentimentStore
+from similarity_index import get_similarity_index
+from entities import TICKER_ALIASES, canonical_ticker, get_ticker_index
+from batching import score_batched
+from model_registry import registry, get_sentiment_model
+from price_store import price_store
+from metrics import span
 
 # ============================================
-# SENTIMENT MODEL (Cached)
+# SENTIMENT MODEL & SCORE CACHE
+# The model itself comes from the shared model_registry.
+# utils does not import streamlit, so batch jobs can use it headless.
 # ============================================
 
-@st.cache_resource
-def get_sentiment_model():
-    """Load sentiment model once and cache it"""
-    return pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+@functools.lru_cache(maxsize=None)
+def get_sentiment_store():
+    """Open the on-disk sentiment score cache once per process"""
+    spec = registry.spec("sentiment")
+    return SentimentStore(spec.model_name, spec.version)
 
 # ============================================
 # DATA LOADING (Fixed for different column names)
 # ============================================
 
-def load_data(filepath):
+# List of possible column names for headlines
+HEADLINE_COLUMNS = [
+    'Headline', 'headline', 'HEADLINE',
+    'Title', 'title', 'TITLE',
+    'News', 'news', 'NEWS',
+    'Text', 'text', 'TEXT',
+    'Description', 'description', 'DESCRIPTION',
+    'Article', 'article'
+]
+
+DATE_COLUMNS = ['Date', 'date', 'DATE', 'Time', 'time', 'Timestamp', 'timestamp', 'Published', 'published']
+
+def detect_columns(columns, text_columns=()):
     """
-    Load CSV data and automatically detect the headline column.
-    Handles different column names: Headline, headline, title, Title, news, etc.
+    Pick the headline and date columns from a list of column names.
+    Falls back to the first of `text_columns` for the headline.
+    Returns (headline_col, date_col); date_col may be None.
     """
-    df = pd.read_csv(filepath)
-    
-    print(f"📋 CSV columns found: {df.columns.tolist()}")
-    
-    # List of possible column names for headlines
-    possible_headline_cols = [
-        'Headline', 'headline', 'HEADLINE',
-        'Title', 'title', 'TITLE',
-        'News', 'news', 'NEWS',
-        'Text', 'text', 'TEXT',
-        'Description', 'description', 'DESCRIPTION',
-        'Article', 'article'
-    ]
+    columns = list(columns)
     
     # Find the headline column
-    headline_col = None
-    for col in possible_headline_cols:
-        if col in df.columns:
-            headline_col = col
-            break
-    
-    # Rename to 'Headline' for consistency
+    headline_col = next((col for col in HEADLINE_COLUMNS if col in columns), None)
     if headline_col:
-        if headline_col != 'Headline':
-            df = df.rename(columns={headline_col: 'Headline'})
         print(f"✅ Using column '{headline_col}' as Headline")
-    else:
+    elif len(text_columns) > 0:
         # Use first text column as fallback
-        text_columns = df.select_dtypes(include=['object']).columns
-        if len(text_columns) > 0:
-            df = df.rename(columns={text_columns[0]: 'Headline'})
-            print(f"⚠️ No standard headline column found. Using '{text_columns[0]}'")
-        else:
-            raise KeyError(
-                f"❌ Could not find a headline column!\n"
-                f"Available columns: {df.columns.tolist()}\n"
-                f"Please ensure your CSV has a column like 'Headline', 'Title', or 'News'"
-            )
+        headline_col = text_columns[0]
+        print(f"⚠️ No standard headline column found. Using '{headline_col}'")
+    else:
+        raise KeyError(
+            f"❌ Could not find a headline column!\n"
+            f"Available columns: {columns}\n"
+            f"Please ensure your CSV has a column like 'Headline', 'Title', or 'News'"
+        )
     
     # Handle Date column (optional)
-    possible_date_cols = ['Date', 'date', 'DATE', 'Time', 'time', 'Timestamp', 'timestamp', 'Published', 'published']
-    date_col = None
-    for col in possible_date_cols:
-        if col in df.columns:
-            date_col = col
-            break
-    
+    date_col = next((col for col in DATE_COLUMNS if col in columns), None)
     if date_col and date_col != 'Date':
-        df = df.rename(columns={date_col: 'Date'})
         print(f"✅ Using column '{date_col}' as Date")
-    elif 'Date' not in df.columns:
-        df['Date'] = pd.Timestamp.now().strftime('%Y-%m-%d')
-        print("⚠️ No date column found. Added placeholder dates.")
+    return headline_col, date_col
+
+# Arrow-backed strings take a fraction of the memory of object columns
+try:
+    import pyarrow  # noqa: F401
+    HEADLINE_DTYPE = "string[pyarrow]"
+except ImportError:
+    HEADLINE_DTYPE = "string"
+
+def _is_jsonl(filepath):
+    return str(filepath).endswith((".jsonl", ".json"))
+
+def resolve_columns(filepath):
+    """Detect headline/date columns from the header (plus a small sample for the fallback)"""
+    if _is_jsonl(filepath):
+        sample = pd.read_json(filepath, lines=True, nrows=100)
+    else:
+        sample = pd.read_csv(filepath, nrows=100)
+    print(f"📋 CSV columns found: {sample.columns.tolist()}")
+    text_columns = sample.select_dtypes(include=['object', 'string']).columns.tolist()
+    return detect_columns(sample.columns, text_columns)
+
+def standardize_columns(chunk, headline_col, date_col):
+    """Keep only Headline/Date, with Arrow strings and datetime64 dates"""
+    columns = {'Headline': chunk[headline_col].astype(HEADLINE_DTYPE)}
+    if date_col:
+        # Parsed once here; unparseable dates become NaT
+        columns['Date'] = pd.to_datetime(chunk[date_col], errors='coerce')
+    else:
+        # Undated rows stay NaT: a made-up date would put them inside
+        # every "recent" time window
+        columns['Date'] = pd.Series(pd.NaT, index=chunk.index, dtype='datetime64[ns]')
+    return pd.DataFrame(columns)
+
+def iter_data(filepath, chunksize=100_000):
+    """
+    Stream a CSV/JSONL headline file in bounded memory.
+    Yields DataFrames with 'Headline' and 'Date' columns only.
+    """
+    headline_col, date_col = resolve_columns(filepath)
+    usecols = [headline_col] + ([date_col] if date_col else [])
     
+    if _is_jsonl(filepath):
+        reader = pd.read_json(filepath, lines=True, chunksize=chunksize)
+    else:
+        # Only the two columns we need are parsed
+        reader = pd.read_csv(filepath, usecols=usecols, dtype=str, chunksize=chunksize)
+    
+    for chunk in reader:
+        yield standardize_columns(chunk, headline_col, date_col)
+
+def load_data(filepath, chunksize=None):
+    """
+    Load CSV data and automatically detect the headline column.
+    Handles different column names: Headline, headline, title, Title, news, etc.
+    The columns are detected from the header and only those are read;
+    pass chunksize to get an iterator of chunks instead of one DataFrame.
+    """
+    if chunksize:
+        return iter_data(filepath, chunksize)
+    
+    headline_col, date_col = resolve_columns(filepath)
+    if _is_jsonl(filepath):
+        raw = pd.read_json(filepath, lines=True)
+    else:
+        usecols = [headline_col] + ([date_col] if date_col else [])
+        raw = pd.read_csv(filepath, usecols=usecols, dtype=str)
+    
+    df = standardize_columns(raw, headline_col, date_col)
+    if not date_col:
+        print("⚠️ No date column found. Dates left empty (NaT).")
+    return df
+
+# ============================================
+# DATE ORDER & TIME WINDOWS
+# The corpus is kept sorted by Date (undated rows last), so a time window
+# is a contiguous block of rows found with two binary searches, and the
+# similarity search only scores that block.
+# ============================================
+
+def date_order(dates):
+    """Stable order that sorts dates ascending with NaT last"""
+    values = dates.to_numpy(dtype='datetime64[ns]').view('i8').copy()
+    values[dates.isna().to_numpy()] = np.iinfo('i8').max
+    return np.argsort(values, kind='stable')
+
+def sort_by_date(df, order=None):
+    """Return df sorted by Date (NaT last) with a fresh RangeIndex"""
+    if order is None:
+        order = date_order(df['Date'])
+    if (order == np.arange(len(order))).all():
+        df = df.reset_index(drop=True)
+    else:
+        df = df.iloc[order].reset_index(drop=True)
+    _mark_sorted(df)
     return df
 
+def _mark_sorted(df):
+    # Tied to this frame: pandas copies attrs onto slices and reordered copies
+    df.attrs["dates_sorted_owner"] = id(df)
+
+def is_date_sorted(df):
+    """True when Date is ascending with all NaT rows at the end"""
+    if df.attrs.get("dates_sorted_owner") == id(df):
+        return True
+    dates = df['Date']
+    valid = dates.notna().to_numpy()
+    n_valid = int(valid.sum())
+    if valid[:n_valid].all() and dates.iloc[:n_valid].is_monotonic_increasing:
+        _mark_sorted(df)
+        return True
+    return False
+
+_RELATIVE_WINDOW = re.compile(r"^(\d+)([dwmy])$")
+_QUARTER = re.compile(r"^(\d{4})-?Q([1-4])$", re.IGNORECASE)
+_WINDOW_UNITS = {"d": "days", "w": "weeks", "m": "months", "y": "years"}
+
+def resolve_window(window, now=None):
+    """
+    Turn a time window into a (start, end) pair of Timestamps, end exclusive.
+    Accepts "30d" / "12w" / "6m" / "1y" (up to now), a quarter "2024Q3",
+    a year "2024", or an explicit (start, end) pair (either may be None).
+    """
+    if window is None:
+        return None, None
+    if isinstance(window, (tuple, list)):
+        start, end = window
+        return (pd.Timestamp(start) if start is not None else None,
+                pd.Timestamp(end) if end is not None else None)
+    text = str(window).strip()
+    match = _RELATIVE_WINDOW.match(text.lower())
+    if match:
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+        offset = pd.DateOffset(**{_WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+        return now - offset, None
+    match = _QUARTER.match(text)
+    if match:
+        start = pd.Timestamp(year=int(match.group(1)), month=3 * int(match.group(2)) - 2, day=1)
+        return start, start + pd.DateOffset(months=3)
+    if text.isdigit() and len(text) == 4:
+        start = pd.Timestamp(year=int(text), month=1, day=1)
+        return start, start + pd.DateOffset(years=1)
+    raise ValueError(f"Unrecognized time window '{window}' (try '30d', '1y', '2024Q3' or '2024')")
+
+def window_rows(df, window):
+    """
+    Rows of df inside `window`: a slice when df is sorted by date (two
+    binary searches), else an array of row positions. None means all rows.
+    """
+    start, end = resolve_window(window)
+    if start is None and end is None:
+        return None
+    dates = df['Date']
+    tz = getattr(dates.dt, 'tz', None)
+    if tz is not None:
+        # Compare in UTC; naive bounds are read in the column's timezone
+        start, end = (
+            None if bound is None else
+            (bound if bound.tzinfo else bound.tz_localize(tz)).tz_convert('UTC').tz_localize(None)
+            for bound in (start, end)
+        )
+    # datetime64[ns] (UTC for tz-aware columns); NaT sorts last
+    values = dates.to_numpy(dtype='datetime64[ns]')
+
+    if is_date_sorted(df):
+        n_valid = int(dates.notna().sum())
+        lo = int(np.searchsorted(values[:n_valid], np.datetime64(start), 'left')) if start is not None else 0
+        hi = int(np.searchsorted(values[:n_valid], np.datetime64(end), 'left')) if end is not None else n_valid
+        return slice(lo, max(lo, hi))
+
+    mask = ~np.isnat(values)
+    if start is not None:
+        mask &= values >= np.datetime64(start)
+    if end is not None:
+        mask &= values < np.datetime64(end)
+    return np.flatnonzero(mask)
+
+def ticker_rows(news_df, ticker):
+    """
+    Sorted row ids of headlines about `ticker` (see entities.py), or None
+    when the ticker is unknown and no restriction is possible.
+    """
+    if not ticker:
+        return None
+    index = get_ticker_index(news_df)
+    if ticker not in index and canonical_ticker(ticker) not in TICKER_ALIASES:
+        return None
+    return index.rows(ticker)
+
+def intersect_rows(rows, other):
+    """Combine two row selections (None = all rows, slice or sorted ids)"""
+    if rows is None:
+        return other
+    if other is None:
+        return rows
+    if isinstance(rows, slice):
+        rows, other = other, rows
+    if isinstance(other, slice):
+        # Sorted ids inside [start, stop): two binary searches
+        lo = np.searchsorted(rows, other.start or 0, 'left')
+        hi = np.searchsorted(rows, other.stop, 'left') if other.stop is not None else len(rows)
+        return rows[lo:hi]
+    return np.intersect1d(rows, other, assume_unique=True)
+
+def news_for_ticker(news_df, ticker, window=None, limit=20):
+    """Most recent headlines about a ticker, newest first (empty if none)"""
+    rows = intersect_rows(ticker_rows(news_df, ticker), window_rows(news_df, window))
+    if rows is None or isinstance(rows, slice):
+        return news_df.iloc[0:0]
+    news = news_df.iloc[rows]
+    return news.sort_values('Date', ascending=False, na_position='last', kind='stable').head(limit)
+
 def get_stock_data(ticker, period="1y"):
-    """Fetch stock data using yfinance"""
+    """Fetch stock data (served from the local price store when possible)"""
     try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=period)
+        # The store keeps the longest history fetched so far and only asks
+        # yfinance for bars newer than the last stored date
+        with span("prices.fetch"):
+            df = price_store.history(ticker, period)
         
-        # FIX: yfinance stores date as index, not as a column
-        # Reset index to make 'Date' an actual column
         if df is not None and not df.empty:
-            df = df.reset_index()
-            print(f"✅ Fetched {len(df)} rows of stock data for {ticker}")
+            print(f"✅ Loaded {len(df)} rows of stock data for {ticker}")
         
         return df
     except Exception as e:
-        st.error(f"Error fetching stock data: {e}")
+        print(f"❌ Error fetching stock data for {ticker}: {e}")
         return None
 
+def get_stock_data_many(tickers, period="1y"):
+    """
+    Fetch several tickers at once (target, comparison, favorites...).
+    Returns {ticker: (DataFrame or None, error message or None)}.
+    """
+    with span("prices.fetch_many"):
+        results = price_store.history_many(tickers, period)
+    for ticker, (df, error) in results.items():
+        if error:
+            print(f"⚠️ Could not fetch {ticker}: {error}")
+    return results
+
 # ============================================
 # SENTIMENT COMPUTATION (Batch Processing)
 # ============================================
@@ -103,7 +312,8 @@ def get_stock_data(ticker, period="1y"):
 def compute_sentiment(df):
     """
     Add sentiment scores to dataframe with BATCH PROCESSING.
-    This is 10-20x faster than processing one-by-one!
+    Batches are bucketed by token length (see batching.py), which is
+    much faster than fixed slices in file order on CPU.
     """
     if 'sentiment' in df.columns:
         return df  # Already computed
@@ -112,75 +322,75 @@ def compute_sentiment(df):
     if 'Headline' not in df.columns:
         raise KeyError(f"'Headline' column not found after loading. Available columns: {df.columns.tolist()}")
     
-    sentiment_model = get_sentiment_model()
-    
     # Prepare headlines
     headlines = df['Headline'].fillna("").tolist()
     
     # Filter out empty headlines
     headlines = [h if h.strip() else "neutral news" for h in headlines]
     
-    # BATCH PROCESSING: Process 32 headlines at once (MUCH faster!)
-    batch_size = 32
-    sentiments = []
+    # Look up scores we already computed in an earlier run
+    store = get_sentiment_store()
+    with span("sentiment.store_lookup"):
+        keys = [store.key(h) for h in headlines]
+        scores = store.get_many(set(keys))
     
-    for i in range(0, len(headlines), batch_size):
-        batch = headlines[i:i + batch_size]
-        
-        try:
-            # Process entire batch at once
-            results = sentiment_model(batch, truncation=True, max_length=512)
-            
-            for result in results:
-                if result['label'] == 'POSITIVE':
-                    sentiments.append(result['score'])
-                else:
-                    sentiments.append(-result['score'])
-        except Exception as e:
-            print(f"⚠️ Error processing batch: {e}")
-            # Fill with neutral sentiment if batch fails
-            sentiments.extend([0.0] * len(batch))
+    # Only run the model on headlines never seen before (deduplicated)
+    missing = {}
+    for key, headline in zip(keys, headlines):
+        if key not in scores and key not in missing:
+            missing[key] = headline
     
-    df['sentiment'] = sentiments
+    if missing:
+        print(f"🔄 Scoring {len(missing)} new headlines ({len(scores)} cached)")
+        model = get_sentiment_model()
+        with span("sentiment.inference"):
+            new_scores = score_batched(
+                model,
+                list(missing.values()),
+                max_batch_size=registry.spec("sentiment").batch_size
+            )
+        fresh = {
+            key: score
+            for key, score in zip(missing.keys(), new_scores)
+            if score is not None
+        }
+        with span("sentiment.store_write"):
+            store.put_many(fresh)
+        scores.update(fresh)
+    
+    # Rows that failed to score are not persisted; they fall back to neutral sentiment
+    df['sentiment'] = [scores.get(key, 0.0) for key in keys]
     return df
 
 # ============================================
 # SIMILARITY COMPUTATION
 # ============================================
 
-def compute_similarity(news_df, headline, top_n=10):
+def compute_similarity(news_df, headline, top_n=10, engine=None, window=None, ticker=None):
     """
-    Find most similar historical headlines using TF-IDF.
+    Find most similar historical headlines using TF-IDF
+    (or sentence embeddings with engine="embedding").
     Optimized to return only top N results.
+    window restricts matches in time ("30d", "1y", "2024Q3", (start, end));
+    on a date-sorted corpus only the rows inside it are scored.
+    ticker restricts matches to headlines about that company (when known).
     """
     # Ensure Headline column exists
     if 'Headline' not in news_df.columns:
         raise KeyError(f"'Headline' column not found. Available columns: {news_df.columns.tolist()}")
     
-    # Combine all headlines with the query
-    all_headlines = news_df['Headline'].fillna("").tolist() + [headline]
-    
-    # TF-IDF vectorization (optimized parameters)
-    vectorizer = TfidfVectorizer(
-        max_features=5000,      # Limit features for speed
-        stop_words='english',    # Remove common words
-        ngram_range=(1, 2),      # Unigrams and bigrams
-        min_df=2                 # Ignore rare terms
-    )
-    
     try:
-        tfidf_matrix = vectorizer.fit_transform(all_headlines)
-        
-        # Compute similarity between query and all headlines
-        query_vector = tfidf_matrix[-1]
-        similarity_scores = cosine_similarity(query_vector, tfidf_matrix[:-1]).flatten()
-        
-        # Add similarity scores to dataframe
-        result_df = news_df.copy()
-        result_df['similarity'] = similarity_scores
-        
-        # Return only top N most similar (sorted descending)
-        return result_df.nlargest(top_n, 'similarity')
+        # Fitted once per corpus version; a query only transforms one headline
+        with span("similarity.index"):
+            index = get_similarity_index(news_df, engine)
+        with span("similarity.query"):
+            rows = intersect_rows(ticker_rows(news_df, ticker), window_rows(news_df, window))
+            positions, similarity_scores = index.top_k(headline, top_n, rows=rows)
+            
+            # Materialize only the winning rows instead of copying the corpus
+            result_df = news_df.iloc[positions].copy()
+            result_df['similarity'] = similarity_scores
+        return result_df
     
     except Exception as e:
         print(f"❌ Error computing similarity: {e}")